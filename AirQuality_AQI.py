@@ -0,0 +1,106 @@
+# AirQuality_AQI.py
+# Description: Shared PM2.5-to-AQI conversion for the Purple Air scripts. pm25_to_aqi converts one concentration at a time, pm25_to_aqi_array
+# converts a whole NumPy/pandas column at once and gives the exact same answers. Running this file benchmarks the two against each other.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import time
+
+import numpy as np
+import pandas as pd
+
+### AQI Breakpoints ------------------------------------------------------------------------------------------------------------------------------------------------
+# AQI Breakpoints (EPA 24-hour PM2.5, 2024 revision)
+breakpoints_pm25 = [
+    (0.0, 9.0, 0, 50),
+    (9.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 125.4, 151, 200),
+    (125.5, 225.4, 201, 300),
+    (225.5, 500.4, 301, 500),
+]
+
+# AQI Breakpoints (EPA 24-hour PM2.5, before the 2024 revision)
+breakpoints_pm25_pre2024 = [
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Convert one concentration to AQI ------------------------------------------------------------------------------------------------------------------------------
+def pm25_to_aqi(concentration, breakpoints=breakpoints_pm25):
+    if pd.isna(concentration):
+        return np.nan
+    concentration = round(concentration, 1)  # EPA rounding rule
+
+    for c_low, c_high, aqi_low, aqi_high in breakpoints:
+        if c_low <= concentration <= c_high:
+            return round(((aqi_high - aqi_low) / (c_high - c_low)) * (concentration - c_low) + aqi_low)
+    if concentration > breakpoints[-1][1]:
+        return breakpoints[-1][3]  # Cap at max AQI
+    return np.nan  # Return NaN for negative or nonsense values
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Convert a whole column of concentrations to AQI ---------------------------------------------------------------------------------------------------------------
+def round_tenths(concentration):
+    # Round to 0.1 the same way Python's round(x, 1) does. np.round scales by 10 first, which can land exactly on .5 for values like 0.15
+    # that are really 0.1499999... in binary, so the few values sitting on a half step are re-rounded one at a time with Python's round.
+    # NaN and ±inf pass through unchanged
+    concentration = np.asarray(concentration, dtype=np.float64)
+    finite = np.isfinite(concentration)
+    scaled = np.where(finite, concentration, 0.0) * 10
+    rounded = np.round(concentration, 1)
+    near_half = finite & (np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(concentration[i]), 1)
+    return rounded
+
+def pm25_to_aqi_array(concentration, breakpoints=breakpoints_pm25):
+    # Same rules as pm25_to_aqi (EPA rounding, breakpoint lookup, cap above the top breakpoint, NaN for missing or negative values),
+    # applied to the whole array at once. A pandas Series comes back as a Series with the same index
+    values = np.asarray(concentration, dtype=np.float64)
+    flat = values.ravel()
+    rounded = round_tenths(flat)
+    aqi = np.full(flat.shape, np.nan)
+
+    # Breakpoints are checked in order, so the first matching category wins just like the for loop in pm25_to_aqi
+    unmatched = ~np.isnan(rounded)
+    for c_low, c_high, aqi_low, aqi_high in breakpoints:
+        in_band = unmatched & (rounded >= c_low) & (rounded <= c_high)
+        aqi[in_band] = np.rint(((aqi_high - aqi_low) / (c_high - c_low)) * (rounded[in_band] - c_low) + aqi_low)
+        unmatched &= ~in_band
+    aqi[unmatched & (rounded > breakpoints[-1][1])] = breakpoints[-1][3]  # Cap at max AQI
+
+    aqi = aqi.reshape(values.shape)
+    if isinstance(concentration, pd.Series):
+        return pd.Series(aqi, index=concentration.index, name=concentration.name)
+    return aqi
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Benchmark the per-row apply against the array converter -------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    n_rows = 300_000  # Roughly the size of the 2019-2025 10-minute archive
+    rng = np.random.default_rng(0)
+    pm25 = pd.Series(rng.lognormal(mean=1.8, sigma=1.0, size=n_rows))
+    pm25[rng.random(n_rows) < 0.01] = np.nan  # Some missing rows
+    pm25[rng.random(n_rows) < 0.001] = 600.0  # Some values above the 500.4 cap
+    pm25[:20] = [0.05, 0.15, 0.25, 8.95, 9.0, 9.04, 9.05, 35.45, 55.45, 125.45, 225.45, 500.4, 500.45, -0.04, -0.06, -1.0, 12.05, 0.0, 1e-9, 499.99]
+
+    for name, table in [('2024 breakpoints', breakpoints_pm25), ('pre-2024 breakpoints', breakpoints_pm25_pre2024)]:
+        start = time.perf_counter()
+        aqi_apply = pm25.apply(pm25_to_aqi, breakpoints=table)
+        apply_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        aqi_array = pm25_to_aqi_array(pm25, table)
+        array_time = time.perf_counter() - start
+
+        # assert_series_equal treats NaN in the same place as equal
+        pd.testing.assert_series_equal(aqi_apply.astype(np.float64), aqi_array, check_exact=True)
+        print(f"{name}: apply {apply_time:.3f} s, array {array_time:.4f} s, {apply_time / array_time:.0f}x faster, outputs identical")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,161 @@
+# AirQuality_Archive.py
+# Description: Binary archive of a 10-minute export for analyses that only need part of it. Each column (UTC time stamps, cleaned A and B channels,
+# their average and the AQI, in the compact dtypes of AirQuality_Compact.py) is written once as its own .npy file, in time order, next to an
+# index.json with the row range of every local year and month. Opening the archive only reads index.json and maps the column files (np.load with
+# mmap_mode='r'), so it is almost instant; a year is a slice of the mapped arrays, read from disk only when used, and processes reading the same
+# archive share the same pages. The archive is rebuilt when the csv changes (same check as the csv cache).
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Cache import cache_paths, file_fingerprint, file_hash, read_cache_info, read_csv_cached, write_cache_info
+from AirQuality_Compact import codes_to_aqi, compact_frame
+from AirQuality_Profile import stage
+from AirQuality_Query import range_slice
+from AirQuality_Time import local_epoch_ns, local_year, time_to_epoch_ns, to_local_timestamps
+
+# Column -> file name in the archive folder
+archive_files = {
+    'epoch_ns': 'epoch_ns.npy',
+    'pm2.5_atm_a': 'pm25_atm_a.npy',
+    'pm2.5_atm_b': 'pm25_atm_b.npy',
+    'pm2.5 Avg': 'pm25_avg.npy',
+    'pm2.5 AQI': 'pm25_aqi.npy',
+}
+
+### Build the archive ---------------------------------------------------------------------------------------------------------------------------------------------
+def archive_path(csv_path, cache_dir=None):
+    # Folder next to the csv cache, e.g. .purpleair_cache/2019-12-01_2025-05-01_10-Minute_Average_archive
+    data_path, _ = cache_paths(csv_path, cache_dir)
+    return os.path.splitext(data_path)[0] + '_archive'
+
+def period_offsets(epoch_ns, timezone):
+    # First and last + 1 row of every local year and month of a sorted epoch array
+    years, months = {}, {}
+    if len(epoch_ns) == 0:
+        return years, months
+    first_year, last_year = local_year(local_epoch_ns(epoch_ns[[0, -1]], timezone))
+    for year in range(int(first_year), int(last_year) + 1):
+        starts = [time_to_epoch_ns(f'{year}-{month:02d}-01', timezone) for month in range(1, 13)] + [time_to_epoch_ns(f'{year + 1}-01-01', timezone)]
+        rows = np.searchsorted(epoch_ns, starts, side='left').tolist()
+        if rows[-1] > rows[0]:
+            years[str(year)] = [rows[0], rows[-1]]
+        for month in range(12):
+            if rows[month + 1] > rows[month]:
+                months[f'{year}-{month + 1:02d}'] = [rows[month], rows[month + 1]]
+    return years, months
+
+def write_column(values, path):
+    tmp_path = path + '.tmp.npy'  # Write then rename, so a reader never maps half a file
+    np.save(tmp_path, np.ascontiguousarray(values))
+    os.replace(tmp_path, path)
+
+def build_archive(csv_path, archive_dir=None, timezone='US/Central', cache_dir=None):
+    # Write the column files and index.json for a 10-minute export
+    archive_dir = archive_path(csv_path, cache_dir) if archive_dir is None else archive_dir
+    fingerprint = file_fingerprint(csv_path)
+    with stage('archive build'):
+        compact = compact_frame(read_csv_cached(csv_path, parse_dates=['time_stamp'], cache_dir=cache_dir))
+        order = np.argsort(compact['epoch_ns'].to_numpy(), kind='stable')
+        if np.any(np.diff(order) != 1):
+            compact = compact.take(order)
+        os.makedirs(archive_dir, exist_ok=True)
+        for column, name in archive_files.items():
+            write_column(compact[column].to_numpy(), os.path.join(archive_dir, name))
+        years, months = period_offsets(compact['epoch_ns'].to_numpy(), timezone)
+    write_cache_info(os.path.join(archive_dir, 'index.json'), {
+        **fingerprint, 'sha1': file_hash(csv_path), 'source': os.path.abspath(csv_path), 'rows': len(compact), 'timezone': timezone,
+        'dtypes': {column: str(compact[column].dtype) for column in archive_files}, 'years': years, 'months': months,
+    })
+    return archive_dir
+
+def archive_is_current(csv_path, archive_dir, timezone):
+    # Same check as the csv cache: size and modification time, then the hash if only the modification time moved
+    info = read_cache_info(os.path.join(archive_dir, 'index.json'))
+    if info is None or info.get('timezone') != timezone:
+        return False
+    if not all(os.path.exists(os.path.join(archive_dir, name)) for name in archive_files.values()):
+        return False
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint['size'] != info.get('size'):
+        return False
+    return fingerprint['mtime_ns'] == info.get('mtime_ns') or file_hash(csv_path) == info.get('sha1')
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Read the archive ----------------------------------------------------------------------------------------------------------------------------------------------
+class Archive:
+    # Memory-mapped columns of one archive. Slices are read-only views of the mapped files
+    def __init__(self, archive_dir):
+        with open(os.path.join(archive_dir, 'index.json')) as f:
+            self.index = json.load(f)
+        self.archive_dir = archive_dir
+        self.timezone = self.index['timezone']
+        self.columns = {column: np.load(os.path.join(archive_dir, name), mmap_mode='r') for column, name in archive_files.items()}
+
+    def __len__(self):
+        return self.index['rows']
+
+    def years(self):
+        return [int(year) for year in self.index['years']]
+
+    def arrays(self, rows):
+        # Every column for a slice of rows (views, nothing is read until the values are used)
+        return {column: values[rows] for column, values in self.columns.items()}
+
+    def year(self, year):
+        first, last = self.index['years'].get(str(year), [0, 0])
+        return self.arrays(slice(first, last))
+
+    def month(self, year, month):
+        first, last = self.index['months'].get(f'{year}-{month:02d}', [0, 0])
+        return self.arrays(slice(first, last))
+
+    def between(self, start=None, end=None):
+        # Rows from start up to (not including) end, local or UTC times (binary search on the mapped time stamps)
+        return self.arrays(range_slice(self.columns['epoch_ns'], start, end, self.timezone))
+
+    def frame(self, arrays):
+        # Working columns (time_stamp, Central_time_stamp, float64 pm2.5 Avg and AQI) for a slice, e.g. for plotting. This one copies
+        return pd.DataFrame({
+            'time_stamp': pd.to_datetime(np.asarray(arrays['epoch_ns']), unit='ns', utc=True),
+            'Central_time_stamp': to_local_timestamps(arrays['epoch_ns'], self.timezone),
+            'pm2.5 Avg': np.asarray(arrays['pm2.5 Avg'], dtype=np.float64),
+            'pm2.5 AQI': codes_to_aqi(np.asarray(arrays['pm2.5 AQI'])),
+        })
+
+def open_archive(csv_path, cache_dir=None, timezone='US/Central', rebuild=False):
+    # The archive of a csv, built first if it is missing or the csv has changed
+    archive_dir = archive_path(csv_path, cache_dir)
+    if rebuild or not archive_is_current(csv_path, archive_dir, timezone):
+        build_archive(csv_path, archive_dir, timezone, cache_dir)
+    return Archive(archive_dir)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Archive.py 2019-12-01_2025-05-01_10-Minute_Average.csv 2024
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else '2019-12-01_2025-05-01_10-Minute_Average.csv'
+    year = int(sys.argv[2]) if len(sys.argv) > 2 else 2024
+
+    start = time.perf_counter()
+    archive = open_archive(csv_file)
+    print(f"Opened archive of {len(archive)} rows ({', '.join(map(str, archive.years()))}) in {time.perf_counter() - start:.3f} s")
+    start = time.perf_counter()
+    archive = Archive(archive.archive_dir)
+    print(f"Opened again (already built) in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    rows = archive.year(year)
+    slice_seconds = time.perf_counter() - start
+    on_disk = isinstance(rows['pm2.5 Avg'], np.memmap) and np.shares_memory(rows['pm2.5 Avg'], archive.columns['pm2.5 Avg'])
+    print(f"{year}: {len(rows['epoch_ns'])} rows sliced in {slice_seconds * 1e6:.0f} µs (view of the mapped file: {on_disk})")
+    aqi = codes_to_aqi(np.asarray(rows['pm2.5 AQI']))
+    print(f"{year}: mean concentration {np.nanmean(rows['pm2.5 Avg']):.2f} µg/m³, mean AQI {np.nanmean(aqi):.1f}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
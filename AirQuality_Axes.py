@@ -0,0 +1,114 @@
+# AirQuality_Axes.py
+# Description: Shared AQI-category axes for every figure. The EPA category background bands, their legend handles and the axis labels/colors are defined
+# once here. category_axes builds a styled figure, and CategoryPanel keeps one styled figure alive so each new panel (another year, another site) only
+# swaps in new line data with set_data, or blits just the line in interactive windows, instead of rebuilding the bands and legend every time.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+
+from AirQuality_Decimate import set_decimated_data
+
+### Air Quality health categories ---------------------------------------------------------------------------------------------------------------------------------
+# Background bands (low, high, color, alpha) and legend labels, for concentration (µg/m³) and AQI axes
+category_styles = {
+    'concentration': {
+        'color': 'tab:blue',
+        'label': 'Concentration',
+        'ylabel': 'PM2.5 Concentration (µg/m³)',
+        'title': 'PM2.5 Concentration Over Time',
+        'bands': [(0, 9.05, 'green', 0.5), (9.05, 35.45, 'yellow', 0.5), (35.45, 55.45, 'orange', 0.7),
+                  (55.45, 125.45, 'red', 0.5), (125.45, 225.45, 'purple', 0.3), (225.45, 500.4, 'purple', 0.6)],
+        'labels': ['Good (0–9 µg/m³)', 'Moderate (9.1–35.4 µg/m³)', 'Unhealthy for sensitive groups (35.5–55.4 µg/m³)',
+                   'Unhealthy (55.5-125.4 µg/m³)', 'Very Unhealthy (125.5-225.4 µg/m³)', 'Hazardous (225.5-500.4 µg/m³)'],
+        'y_buffer': 0.25,
+    },
+    'aqi': {
+        'color': 'tab:red',
+        'label': 'AQI',
+        'ylabel': 'AQI',
+        'title': 'PM2.5 AQI Over Time',
+        'bands': [(0, 50.5, 'green', 0.5), (50.5, 100.5, 'yellow', 0.5), (100.5, 150.5, 'orange', 0.7),
+                  (150.5, 200.5, 'red', 0.5), (200.5, 300.5, 'purple', 0.3), (300.5, 500, 'purple', 0.6)],
+        'labels': ['Good (0–50)', 'Moderate (51–100)', 'Unhealthy for sensitive groups (101-150)',
+                   'Unhealthy (151-200)', 'Very Unhealthy (201-300)', 'Hazardous (301-500)'],
+        'y_buffer': 0.27,
+    },
+}
+
+@lru_cache(maxsize=None)
+def category_handles(kind):
+    # Legend patches for the categories, made once and shared by every legend
+    style = category_styles[kind]
+    return tuple(mpatches.Patch(color=color, alpha=alpha, label=label) for (_, _, color, alpha), label in zip(style['bands'], style['labels']))
+
+def add_category_bands(ax, kind, bottom=None, top=None):
+    # Coloring graph background, identifying Air Quality health categories. bottom/top stretch the first and last band
+    bands = category_styles[kind]['bands']
+    for i, (low, high, color, alpha) in enumerate(bands):
+        if i == 0 and bottom is not None:
+            low = bottom
+        if i == len(bands) - 1 and top is not None:
+            high = top
+        ax.axhspan(low, high, facecolor=color, alpha=alpha)
+
+def add_category_legend(ax, kind, extra_handles=(), loc='best'):
+    # Making legend to identify Air Quality Health categories
+    return ax.legend(handles=[*category_handles(kind), *extra_handles], loc=loc)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Styled axes factory -------------------------------------------------------------------------------------------------------------------------------------------
+def category_axes(kind, time_label='Central', figsize=None):
+    # New figure with the category bands, legend, labels and grid already in place, plus an empty line for the data
+    style = category_styles[kind]
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.set_xlabel(f'Time ({time_label})')
+    ax.set_ylabel(style['ylabel'], color=style['color'])
+    ax.tick_params(axis='y', labelcolor=style['color'])
+    ax.set_title(style['title'])
+    add_category_bands(ax, kind)
+    add_category_legend(ax, kind)
+    ax.grid(True)
+    line, = ax.plot([], [], color=style['color'], label=style['label'])
+    return fig, ax, line
+
+class CategoryPanel:
+    # One styled figure reused for many panels. Build it once, then call show() for each year/site and save the figure
+    def __init__(self, kind, time_label='Central', figsize=None):
+        self.kind = kind
+        self.fig, self.ax, self.line = category_axes(kind, time_label, figsize)
+        self.fig.tight_layout()
+        self.background = None
+
+    def show(self, x, y, title=None, xlim=None, ylim=None):
+        # Swap in new data (decimated, see AirQuality_Decimate.py) and update the title and limits. Bands and legend stay as they are
+        set_decimated_data(self.line, x, y)
+        if title is not None:
+            self.ax.set_title(title)
+        if xlim is not None:
+            self.ax.set_xlim(*xlim)
+        if ylim is not None:
+            self.ax.set_ylim(*ylim)
+        self.background = None  # Limits may have changed, so a saved blit background no longer fits
+        return self
+
+    def blit(self, x, y):
+        # Interactive update with the axes limits unchanged: redraw only the line over a saved copy of the background
+        canvas = self.fig.canvas
+        if self.background is None:
+            self.line.set_visible(False)
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.ax.bbox)
+            self.line.set_visible(True)
+        set_decimated_data(self.line, x, y)
+        canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+
+    def save(self, path, **savefig_kwargs):
+        self.fig.savefig(path, **savefig_kwargs)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
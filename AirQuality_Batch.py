@@ -0,0 +1,110 @@
+# AirQuality_Batch.py
+# Description: Headless report rendering. Uses the Agg backend (no windows, no plt.show) and writes the overview concentration and AQI figures and one AQI
+# figure per year, for every site, to an output folder as PNG/SVG/PDF. Each figure is a separate task in a process pool, so the figures render in
+# parallel across CPU cores. Figures look the same as the ones in AirQuality_Cherokee_convert.py, and each worker reuses one styled panel
+# per figure kind (AirQuality_Axes.py).
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Headless: render straight to files
+import numpy as np
+
+from AirQuality_Axes import CategoryPanel, category_styles
+from AirQuality_Cache import read_csv_cached
+from AirQuality_Incremental import add_derived_columns
+from AirQuality_Query import TimeQuery, year_slices
+from AirQuality_Time import to_local_timestamps
+
+yearly_y_buffer = 0.18  # Yearly figures share the y-axis of the whole-archive AQI figure
+
+### Render one figure (runs in a worker process) ------------------------------------------------------------------------------------------------------------------
+panels = {}  # One styled panel per figure kind and time zone in each worker process, reused for every figure it renders
+
+def render_figure(task):
+    # task holds only plain arrays and settings, so it is cheap to send to a worker
+    key = (task['kind'], task['timezone_label'])
+    if key not in panels:
+        panels[key] = CategoryPanel(task['kind'], task['timezone_label'])
+    panel = panels[key]
+
+    # X-axis expansion (10% on each side) and Y-axis expansion
+    times = to_local_timestamps(task['epoch_ns'], task['timezone'])
+    x_buffer = (times.max() - times.min()) * 0.1
+    title = category_styles[task['kind']]['title']
+    if task['year'] is not None:
+        title = f"{title} - {task['year']}"
+    panel.show(times, task['values'], title=f"{task['site']}: {title}",
+               xlim=(times.min() - x_buffer, times.max() + x_buffer), ylim=(0, task['y_max'] * (1 + task['y_buffer'])))
+
+    paths = []
+    for fmt in task['formats']:
+        path = os.path.join(task['out_dir'], f"{task['name']}.{fmt}")
+        panel.save(path)
+        paths.append(path)
+    return paths
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Build the list of figures -------------------------------------------------------------------------------------------------------------------------------------
+def site_tasks(site, df, timezone, timezone_label, out_dir, formats, exclude_years=(2019,)):
+    # Overview concentration and AQI figures plus one AQI figure per year for one site. df needs time_stamp, pm2.5 Avg and pm2.5 AQI
+    query = TimeQuery(df, timezone=timezone)  # Rows in time order, so each year is one slice
+    epoch_ns = query.epoch_ns
+    concentration = query.df['pm2.5 Avg'].to_numpy(dtype=np.float64)
+    aqi = query.df['pm2.5 AQI'].to_numpy(dtype=np.float64)
+    aqi_max = np.nanmax(aqi)
+    common = {'site': site, 'timezone': timezone, 'timezone_label': timezone_label, 'out_dir': out_dir, 'formats': formats}
+
+    tasks = [
+        {**common, 'name': f'{site}_concentration', 'kind': 'concentration', 'year': None, 'epoch_ns': epoch_ns,
+         'values': concentration, 'y_max': np.nanmax(concentration), 'y_buffer': category_styles['concentration']['y_buffer']},
+        {**common, 'name': f'{site}_aqi', 'kind': 'aqi', 'year': None, 'epoch_ns': epoch_ns,
+         'values': aqi, 'y_max': aqi_max, 'y_buffer': category_styles['aqi']['y_buffer']},
+    ]
+    for year, rows in year_slices(epoch_ns, timezone):
+        if year in exclude_years:
+            continue  # Skip plotting for this year
+        tasks.append({**common, 'name': f'{site}_aqi_{year}', 'kind': 'aqi', 'year': year, 'epoch_ns': epoch_ns[rows],
+                      'values': aqi[rows], 'y_max': aqi_max, 'y_buffer': yearly_y_buffer})
+    return tasks
+
+def render_report(tasks, workers=None):
+    # Render every figure, in parallel unless workers == 1. Returns the paths written
+    if workers == 1:
+        results = [render_figure(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_figure, tasks))
+    return [path for paths in results for path in paths]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Batch.py 2019-12-01_2025-05-01_10-Minute_Average.csv --site Cherokee --out report --formats png pdf
+    parser = argparse.ArgumentParser(description='Render Purple Air report figures without a display.')
+    parser.add_argument('csv_files', nargs='+', help='10-minute export csv files, one per site')
+    parser.add_argument('--site', nargs='+', help='Site name for each csv (default: csv file name)')
+    parser.add_argument('--timezone', nargs='+', default=['US/Central'], help='Time zone for each csv (one value applies to all)')
+    parser.add_argument('--out', default='report', help='Output folder')
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--exclude-years', nargs='*', type=int, default=[2019])
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU core)')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    sites = args.site or [os.path.splitext(os.path.basename(path))[0] for path in args.csv_files]
+    timezones = args.timezone * len(args.csv_files) if len(args.timezone) == 1 else args.timezone
+
+    tasks = []
+    for csv_file, site, timezone in zip(args.csv_files, sites, timezones):
+        df = add_derived_columns(read_csv_cached(csv_file, parse_dates=['time_stamp']), timezone)
+        timezone_label = timezone.split('/')[-1].replace('_', ' ')  # 'US/Central' -> 'Central'
+        tasks += site_tasks(site, df, timezone, timezone_label, args.out, args.formats, args.exclude_years)
+
+    written = render_report(tasks, args.workers)
+    print(f"Wrote {len(written)} files to {os.path.abspath(args.out)}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,173 @@
+# AirQuality_Benchmark.py
+# Description: Benchmark suite for the processing pipeline on synthetic archives (AirQuality_Synthetic.py) from one month to 20 years. Each stage (read,
+# time zone conversion, cleaning, A/B average, AQI, daily resample, hourly box statistics, EPA merge/fit, figure render, SD card ingest) is timed
+# on its own, best of several repeats. Every run is appended to a history file, and the summary shows the change against the previous run of the same
+# size, so a change can be checked for speedups or regressions.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+
+import matplotlib
+matplotlib.use('Agg')  # Figures are rendered to memory, never shown
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Axes import CategoryPanel
+from AirQuality_Diurnal import hourly_stats
+from AirQuality_EPA import batch_fit, comparison_pairs, purpleair_daily, read_epa_daily
+from AirQuality_SD_ingest import load_sd_folder
+from AirQuality_Synthetic import size_months, write_10minute_csv, write_epa_daily_csv, write_sd_folder
+from AirQuality_Time import local_time_fields, parse_time_columns
+
+bench_folder = '.purpleair_bench'  # Synthetic data and the run history
+
+### Synthetic inputs ----------------------------------------------------------------------------------------------------------------------------------------------
+def bench_inputs(size, data_dir=bench_folder, seed=0):
+    # Paths of the 10-minute export, EPA daily file and SD card folder for one size, written the first time they are needed
+    folder = os.path.join(data_dir, size)
+    paths = {
+        'csv': os.path.join(folder, f'synthetic_{size}_10-Minute_Average.csv'),
+        'epa': os.path.join(folder, f'daily_avg_EPA_pm25_synthetic_{size}.csv'),
+        'sd': os.path.join(folder, 'SD'),
+    }
+    if not all(os.path.exists(path) for path in paths.values()):
+        os.makedirs(folder, exist_ok=True)
+        df = write_10minute_csv(paths['csv'], months=size_months[size], seed=seed)
+        write_epa_daily_csv(paths['epa'], df, seed)
+        write_sd_folder(paths['sd'], days=7, seed=seed)
+    return paths
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Pipeline stages -----------------------------------------------------------------------------------------------------------------------------------------------
+# Each stage takes the shared state dict, adds its result and returns nothing. Stages run in order, so each one finds what it needs
+def stage_read(state):
+    state['df'] = parse_time_columns(pd.read_csv(state['paths']['csv']), ['time_stamp'])
+
+def stage_tz_convert(state):
+    state['df']['Central_time_stamp'] = state['df']['time_stamp'].dt.tz_convert('US/Central')
+
+def stage_clean(state):
+    df = state['df']
+    df['pm2.5_atm_a_clean'] = df['pm2.5_atm_a'].where(df['pm2.5_atm_a'] <= 500.4, np.nan)
+    df['pm2.5_atm_b_clean'] = df['pm2.5_atm_b'].where(df['pm2.5_atm_b'] <= 500.4, np.nan)
+
+def stage_average(state):
+    df = state['df']
+    df['pm2.5 Avg'] = df[['pm2.5_atm_a_clean', 'pm2.5_atm_b_clean']].mean(axis=1)
+
+def stage_aqi(state):
+    state['df']['pm2.5 AQI'] = pm25_to_aqi_array(state['df']['pm2.5 Avg'])
+
+def stage_daily_resample(state):
+    state['daily'] = state['df'].set_index('Central_time_stamp')[['pm2.5 Avg', 'pm2.5 AQI']].resample('D').mean()
+
+def stage_hourly_box_stats(state):
+    hours = local_time_fields(state['df']['time_stamp'], 'US/Central')['hour']
+    state['hourly'] = hourly_stats(state['df']['pm2.5 AQI'], hours)
+
+def stage_epa_merge_fit(state):
+    sites = {'synthetic': (purpleair_daily(state['daily']), read_epa_daily([state['paths']['epa']]))}
+    state['fits'] = batch_fit(comparison_pairs(sites, quantity='aqi'))
+
+def stage_render(state):
+    if 'panel' not in state:
+        state['panel'] = CategoryPanel('aqi')
+    df = state['df']
+    state['panel'].show(df['Central_time_stamp'], df['pm2.5 AQI'], xlim=(df['Central_time_stamp'].min(), df['Central_time_stamp'].max()),
+                        ylim=(0, 500))
+    state['panel'].save(io.BytesIO(), format='png')
+
+def stage_sd_ingest(state):
+    state['sd'] = load_sd_folder(state['paths']['sd'], workers=1)
+
+stages = [
+    ('read', stage_read),
+    ('tz convert', stage_tz_convert),
+    ('clean', stage_clean),
+    ('average', stage_average),
+    ('AQI', stage_aqi),
+    ('daily resample', stage_daily_resample),
+    ('hourly box stats', stage_hourly_box_stats),
+    ('EPA merge/fit', stage_epa_merge_fit),
+    ('render', stage_render),
+    ('SD ingest', stage_sd_ingest),
+]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Run and track -------------------------------------------------------------------------------------------------------------------------------------------------
+def run_benchmark(size, repeat=3, data_dir=bench_folder, only=None):
+    # Best-of-repeat wall time of every stage for one archive size. Returns one record per stage
+    state = {'paths': bench_inputs(size, data_dir)}
+    records = []
+    for name, stage in stages:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage(state)
+            times.append(time.perf_counter() - start)
+        if only is None or name in only:
+            records.append({'size': size, 'rows': len(state['df']), 'stage': name, 'seconds': min(times), 'median_seconds': float(np.median(times))})
+    return records
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def read_history(history_path):
+    if not os.path.exists(history_path):
+        return pd.DataFrame(columns=['run', 'size', 'stage', 'seconds'])
+    with open(history_path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+def append_history(history_path, records):
+    run = {'run': pd.Timestamp.now().isoformat(timespec='seconds'), 'commit': git_commit(), 'python': platform.python_version(),
+           'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine()}
+    with open(history_path, 'a') as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + '\n')
+    return run['run']
+
+def compare_with_previous(records, history):
+    # Summary table with the change against the last earlier run of each size and stage
+    summary = pd.DataFrame(records).set_index(['size', 'stage'])
+    if len(history):
+        previous = history.groupby(['size', 'stage'])['seconds'].last()
+        summary['previous'] = previous.reindex(summary.index)
+        summary['change %'] = (summary['seconds'] / summary['previous'] - 1) * 100
+    return summary
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Benchmark.py --sizes 1m 1y 5y --repeat 3
+    parser = argparse.ArgumentParser(description='Time each stage of the Purple Air pipeline on synthetic archives.')
+    parser.add_argument('--sizes', nargs='+', default=['1m', '1y'], choices=list(size_months))
+    parser.add_argument('--repeat', type=int, default=3, help='Repeats per stage (the best time is kept)')
+    parser.add_argument('--stages', nargs='+', default=None, help='Only report these stages (all stages still run)')
+    parser.add_argument('--data-dir', default=bench_folder, help='Folder for the synthetic data')
+    parser.add_argument('--history', default=None, help='History file (default: <data-dir>/history.jsonl)')
+    parser.add_argument('--no-save', action='store_true', help="Don't add this run to the history")
+    args = parser.parse_args()
+
+    history_path = args.history or os.path.join(args.data_dir, 'history.jsonl')
+    os.makedirs(args.data_dir, exist_ok=True)
+    history = read_history(history_path)
+
+    records = []
+    for size in args.sizes:
+        records += run_benchmark(size, args.repeat, args.data_dir, args.stages)
+    print(compare_with_previous(records, history).to_string(float_format='{:.4f}'.format))
+    if not args.no_save:
+        print(f"Run {append_history(history_path, records)} saved to {history_path}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
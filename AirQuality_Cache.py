@@ -0,0 +1,123 @@
+# AirQuality_Cache.py
+# Description: Load Purple Air csv files through a binary, column-based cache. The first read parses the csv and saves the typed table next to it
+# (Feather if pyarrow is installed, otherwise a pandas pickle). Later reads load the cache directly, skipping the text and date parsing. The cache is
+# rebuilt automatically when the csv's size, modification time or contents change.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from AirQuality_Profile import instrumented
+from AirQuality_Time import parse_time_columns
+
+try:
+    import pyarrow.feather as feather  # Optional, faster cache format
+except ImportError:
+    feather = None
+
+cache_folder = '.purpleair_cache'  # Made next to the csv file
+
+### Source file fingerprint ---------------------------------------------------------------------------------------------------------------------------------------
+def file_hash(path, block_size=1 << 20):
+    # SHA-1 of the file contents, read in 1 MB blocks
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def source_fingerprint(path):
+    # file_fingerprint of a csv, or of every file in a folder (e.g. SD card day files), so a file changed in place inside the folder is noticed
+    if not os.path.isdir(path):
+        return file_fingerprint(path)
+    with os.scandir(path) as entries:
+        files = sorted((entry.name, entry.stat()) for entry in entries if entry.is_file())
+    return {'files': [[name, stat.st_size, stat.st_mtime_ns] for name, stat in files]}
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Cache file locations ------------------------------------------------------------------------------------------------------------------------------------------
+def cache_paths(csv_path, cache_dir=None, cache_name=None):
+    # cache_name keeps a second cached read of the same csv (e.g. only some columns) apart from the full one
+    csv_path = os.path.abspath(csv_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(csv_path), cache_folder)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    if cache_name is not None:
+        stem = f'{stem}_{cache_name}'
+    data_ext = '.feather' if feather is not None else '.pkl'
+    return os.path.join(cache_dir, stem + data_ext), os.path.join(cache_dir, stem + '.json')
+
+def read_cache_info(info_path):
+    try:
+        with open(info_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache_info(info_path, info):
+    tmp_path = f'{info_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(info, f, indent=2)
+    os.replace(tmp_path, info_path)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Save and load the cached table --------------------------------------------------------------------------------------------------------------------------------
+def save_table(df, data_path):
+    # Write then rename, so a crash never leaves half a cache behind. The temporary name is per process: fleet workers reading the same csv
+    # can save its cache at the same time
+    tmp_path = f'{data_path}.{os.getpid()}.tmp'
+    if data_path.endswith('.feather'):
+        feather.write_feather(df.reset_index(drop=True), tmp_path)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
+
+def load_table(data_path):
+    if data_path.endswith('.feather'):
+        return feather.read_feather(data_path)
+    return pd.read_pickle(data_path)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Cached csv loader ---------------------------------------------------------------------------------------------------------------------------------------------
+def cache_is_current(csv_path, info, read_options, check_hash):
+    # Size and modification time are checked first since they are free. The hash is only computed when asked for, or when the
+    # modification time moved but the size did not (e.g. the same export downloaded again), so an unchanged file keeps its cache
+    if info is None or info.get('read_options') != read_options:
+        return False
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint['size'] != info.get('size'):
+        return False
+    if fingerprint['mtime_ns'] == info.get('mtime_ns') and not check_hash:
+        return True
+    return file_hash(csv_path) == info.get('sha1')
+
+@instrumented('load')
+def read_csv_cached(csv_path, parse_dates=None, cache_dir=None, check_hash=False, cache_name=None, **read_csv_kwargs):
+    # Drop-in replacement for pd.read_csv(csv_path, parse_dates=..., **read_csv_kwargs). Date columns come back as UTC
+    data_path, info_path = cache_paths(csv_path, cache_dir, cache_name)
+    read_options = {'parse_dates': parse_dates, 'time_parser': 'explicit-format', **{k: repr(v) for k, v in sorted(read_csv_kwargs.items())}}
+
+    info = read_cache_info(info_path)
+    if os.path.exists(data_path) and cache_is_current(csv_path, info, read_options, check_hash):
+        if info['mtime_ns'] != file_fingerprint(csv_path)['mtime_ns']:
+            info.update(file_fingerprint(csv_path))  # Same contents, newer timestamp
+            write_cache_info(info_path, info)
+        return load_table(data_path)
+
+    # Missing or stale cache: parse the csv once and save it
+    fingerprint = file_fingerprint(csv_path)
+    df = pd.read_csv(csv_path, **read_csv_kwargs)
+    parse_time_columns(df, parse_dates)  # Explicit time stamp formats (AirQuality_Time.py)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    save_table(df, data_path)
+    write_cache_info(info_path, {**fingerprint, 'sha1': file_hash(csv_path), 'read_options': read_options, 'rows': len(df)})
+    return df
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,182 @@
+# AirQuality_Calibration.py
+# Description: Calibration of the PurpleAir concentration against the EPA monitors. A calibration table holds one correction per sensor and period:
+# corrected = slope * pm2.5 + humidity * RH + intercept, either linear (humidity = 0) or humidity-aware (using humidity_a from the export).
+# Corrections are fitted per year from the daily means matched with the EPA daily files, or taken from the US-wide EPA correction, and the table is
+# saved as a csv so it can be checked and edited. apply_calibration corrects the whole concentration column in one pass (each row finds its
+# period by binary search) before the AQI conversion. Pipeline.calibrated (AirQuality_Pipeline.py) keeps the raw and every corrected series.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_EPA import day_years
+from AirQuality_Profile import stage
+from AirQuality_Time import local_epoch_ns, ns_per_day, utc_epoch_ns
+
+calibration_columns = ['sensor', 'start', 'end', 'method', 'slope', 'humidity', 'intercept', 'n', 'r2', 'rmse']
+
+# US-wide correction for PurpleAir PM2.5 (Barkjohn et al. 2021): 0.524 * PM2.5 - 0.0862 * RH + 5.75. It was fitted on the cf_1 channels, which
+# match the atm channels below about 25 µg/m³
+epa_us_correction = {'method': 'epa-us', 'slope': 0.524, 'humidity': -0.0862, 'intercept': 5.75}
+
+### Fit corrections -----------------------------------------------------------------------------------------------------------------------------------------------
+def local_days(df, timezone):
+    return local_epoch_ns(utc_epoch_ns(df['time_stamp']), timezone) // ns_per_day
+
+def daily_inputs(df, timezone, column='pm2.5 Avg', humidity_column='humidity_a'):
+    # Daily mean concentration and humidity per local day number (days without a valid concentration are dropped)
+    days = local_days(df, timezone)
+    first = days.min()
+    slot = days - first
+    pm = df[column].to_numpy(dtype=np.float64)
+    rh = df[humidity_column].to_numpy(dtype=np.float64) if humidity_column in df else np.full(len(df), np.nan)
+    valid_pm, valid_rh = ~np.isnan(pm), ~np.isnan(rh)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pm_mean = np.bincount(slot[valid_pm], weights=pm[valid_pm], minlength=slot.max() + 1) / np.bincount(slot[valid_pm], minlength=slot.max() + 1)
+        rh_mean = np.bincount(slot[valid_rh], weights=rh[valid_rh], minlength=slot.max() + 1) / np.bincount(slot[valid_rh], minlength=slot.max() + 1)
+    day = first + np.arange(len(pm_mean))
+    keep = ~np.isnan(pm_mean)
+    return pd.DataFrame({'day': day[keep], 'pm2.5': pm_mean[keep], 'humidity': rh_mean[keep]})
+
+def fit_calibrations(df, epa_daily, sensor, timezone='US/Central', method='linear', column='pm2.5 Avg'):
+    # One correction per calendar year, fitted by least squares on the days with both PurpleAir and EPA data. method is 'linear'
+    # (EPA = slope * PurpleAir + intercept) or 'humidity' (EPA = slope * PurpleAir + humidity * RH + intercept)
+    daily = daily_inputs(df, timezone, column)
+    _, pa_rows, epa_rows = np.intersect1d(daily['day'].to_numpy(), epa_daily['day'].to_numpy(), assume_unique=True, return_indices=True)
+    days = daily['day'].to_numpy()[pa_rows]
+    x = daily['pm2.5'].to_numpy()[pa_rows]
+    rh = daily['humidity'].to_numpy()[pa_rows]
+    y = epa_daily['concentration'].to_numpy()[epa_rows]
+    keep = np.isfinite(x) & np.isfinite(y) & (np.isfinite(rh) if method == 'humidity' else True)
+    days, x, rh, y = days[keep], x[keep], rh[keep], y[keep]
+
+    rows = []
+    years = day_years(days)
+    for year in np.unique(years):
+        in_year = years == year
+        terms = [x[in_year], rh[in_year]] if method == 'humidity' else [x[in_year]]
+        design = np.column_stack(terms + [np.ones(in_year.sum())])
+        if in_year.sum() < design.shape[1] + 1:
+            continue  # Too few days for this year
+        coefficients, *_ = np.linalg.lstsq(design, y[in_year], rcond=None)
+        residuals = y[in_year] - design @ coefficients
+        rows.append({
+            'sensor': sensor,
+            'start': f'{year}-01-01',
+            'end': f'{year + 1}-01-01',
+            'method': method,
+            'slope': coefficients[0],
+            'humidity': coefficients[1] if method == 'humidity' else 0.0,
+            'intercept': coefficients[-1],
+            'n': int(in_year.sum()),
+            'r2': 1 - np.sum(residuals ** 2) / np.sum((y[in_year] - y[in_year].mean()) ** 2),
+            'rmse': np.sqrt(np.mean(residuals ** 2)),
+        })
+    return pd.DataFrame(rows, columns=calibration_columns)
+
+def us_correction(sensor, start='2000-01-01', end='2100-01-01'):
+    # The US-wide EPA correction as a one-row calibration table
+    return pd.DataFrame([{'sensor': sensor, 'start': start, 'end': end, **epa_us_correction, 'n': 0, 'r2': np.nan, 'rmse': np.nan}],
+                        columns=calibration_columns)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Saved calibration tables --------------------------------------------------------------------------------------------------------------------------------------
+def save_calibrations(table, path):
+    table.to_csv(path, index=False)
+
+def load_calibrations(path, sensor=None):
+    table = pd.read_csv(path, dtype={'sensor': str, 'start': str, 'end': str, 'method': str})
+    if sensor is not None:
+        table = table[table['sensor'] == sensor]
+    return table.reset_index(drop=True)
+
+def calibration_key(table):
+    # Identifies a calibration table by its contents, for caching corrected series
+    return pd.util.hash_pandas_object(table[calibration_columns[:7]], index=False).sum().item()
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Apply a calibration -------------------------------------------------------------------------------------------------------------------------------------------
+def apply_calibration(df, table, timezone='US/Central', column='pm2.5 Avg', humidity_column='humidity_a'):
+    # Corrected concentration for every row: each row's local day is looked up in the sorted period starts, and the coefficients of its period
+    # are applied to the whole column at once. Rows outside every period (or without humidity for a humidity correction) are left as they are.
+    # Corrected values are not allowed below 0. table must hold one sensor's corrections (see load_calibrations)
+    sensors = table['sensor'].unique()
+    if len(sensors) > 1:
+        raise ValueError(f"Calibration table has corrections for several sensors ({', '.join(map(str, sensors))}); select one first")
+    with stage('calibration', rows=len(df)):
+        pm = df[column].to_numpy(dtype=np.float64)
+        if len(table) == 0:
+            return pm.copy()
+        table = table.sort_values('start', ignore_index=True)
+        starts = pd.to_datetime(table['start']).to_numpy().astype('datetime64[D]').view(np.int64)
+        ends = pd.to_datetime(table['end']).to_numpy().astype('datetime64[D]').view(np.int64)
+        if np.any(starts[1:] < ends[:-1]):
+            raise ValueError('Calibration periods overlap; each row must fall in at most one period')
+
+        days = local_days(df, timezone)
+        period = np.searchsorted(starts, days, side='right') - 1
+        inside = (period >= 0) & (days < ends[np.maximum(period, 0)])
+        period = np.maximum(period, 0)
+
+        rh = df[humidity_column].to_numpy(dtype=np.float64) if humidity_column in df else np.full(len(df), np.nan)
+        humidity = table['humidity'].to_numpy(dtype=np.float64)[period]
+        rh_term = np.where(humidity != 0, humidity * rh, 0.0)
+        corrected = table['slope'].to_numpy(dtype=np.float64)[period] * pm + rh_term + table['intercept'].to_numpy(dtype=np.float64)[period]
+        corrected = np.where(inside & ~np.isnan(rh_term), np.maximum(corrected, 0), pm)
+        return corrected
+
+def calibrated_frame(df, table, timezone='US/Central'):
+    # Time stamps with the corrected concentration and its AQI, in the same layout as the derived frame, so the reports work on either
+    corrected = apply_calibration(df, table, timezone)
+    with stage('AQI', rows=len(df)):
+        aqi = pm25_to_aqi_array(corrected)
+    return pd.DataFrame({
+        'time_stamp': df['time_stamp'],
+        'Central_time_stamp': df['Central_time_stamp'],
+        'pm2.5 Avg': corrected,
+        'pm2.5 AQI': aqi,
+    }, index=df.index)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Calibration.py --csv 2019-12-01_2025-05-01_10-Minute_Average.csv --method humidity --out calibrations.csv
+    import argparse
+    import time
+    from AirQuality_EPA import read_epa_daily
+    from AirQuality_Pipeline import get_pipeline
+
+    parser = argparse.ArgumentParser(description='Fit per-year corrections against the EPA daily means and save them as a calibration table.')
+    parser.add_argument('--csv', default='2019-12-01_2025-05-01_10-Minute_Average.csv')
+    parser.add_argument('--epa', default='daily_avg_EPA_pm25_*.csv', help='EPA daily file(s), glob pattern allowed')
+    parser.add_argument('--site', default='Cherokee')
+    parser.add_argument('--timezone', default='US/Central')
+    parser.add_argument('--method', default='linear', choices=['linear', 'humidity', 'epa-us'])
+    parser.add_argument('--table', default=None, help="Apply this site's rows of a saved calibration table instead of fitting")
+    parser.add_argument('--out', default=None, help='Save the calibration table to this csv')
+    args = parser.parse_args()
+
+    pipeline = get_pipeline(args.csv, timezone=args.timezone, site=args.site, epa_files=args.epa)
+    df = pipeline['derived']
+    if args.table is not None:
+        table = load_calibrations(args.table, args.site)
+    elif args.method == 'epa-us':
+        table = us_correction(args.site)
+    else:
+        table = fit_calibrations(df, read_epa_daily(args.epa), args.site, args.timezone, method=args.method)
+    print(table.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+    if args.out is not None:
+        save_calibrations(table, args.out)
+
+    start = time.perf_counter()
+    corrected = pipeline.calibrated(table)
+    print(f"Calibrated {len(corrected)} rows in {time.perf_counter() - start:.3f} s")
+    start = time.perf_counter()
+    pipeline.calibrated(table)
+    pipeline.calibrated(us_correction(args.site))
+    pipeline.calibrated(table)
+    print(f"Switching calibrations (cached raw and corrected frames): {time.perf_counter() - start:.3f} s")
+    print(f"Mean AQI raw {df['pm2.5 AQI'].mean():.1f}, corrected {corrected['pm2.5 AQI'].mean():.1f}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
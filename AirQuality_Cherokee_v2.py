@@ -8,10 +8,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+from AirQuality_Cache import read_csv_cached
+
 #df = pd.read_csv('last_500_timepoints.csv', parse_dates=['time_stamp']) # Convert csv file into usable table
 
 ### Original csv file with all values
-df = pd.read_csv('2019-01-01_2025-05-01_10-Minute_Average.csv', parse_dates=['time_stamp']) # Convert csv file into usable table
+df = read_csv_cached('2019-01-01_2025-05-01_10-Minute_Average.csv', parse_dates=['time_stamp']) # Convert csv file into usable table (cached after the first run)
 ###
 
 #Convert Universal time zone into local (Central) time for Mississippi
@@ -0,0 +1,129 @@
+# AirQuality_Compact.py
+# Description: Compact in-memory layout for the 10-minute data. The working frame from add_derived_columns keeps float64 raw and _clean copies of
+# both channels, a float64 average and AQI, and a tz-aware local time column. The compact frame keeps one int64 UTC epoch column (local time is
+# derived when needed, see AirQuality_Time.py), the cleaned A/B channels and their average as float32, and the AQI as uint16 with a sentinel for
+# missing values. Cleaning is done in place on the channel arrays, with no intermediate columns. MemoryReport lists the footprint after each stage.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Time import to_local_timestamps, utc_epoch_ns
+
+aqi_missing = np.iinfo(np.uint16).max  # uint16 AQI code for a missing value (real AQI values stop at 500)
+clean_limit = 500.4  # Channel values above this are treated as missing, as in add_derived_columns
+
+### Compact columns -----------------------------------------------------------------------------------------------------------------------------------------------
+def clean_in_place(values, limit=clean_limit):
+    # Replace values > limit with NaN, in the array itself
+    with np.errstate(invalid='ignore'):
+        np.putmask(values, values > limit, np.nan)
+    return values
+
+def average_channels(a, b):
+    # Row mean of two channels, skipping NaN (the same result as df[[a, b]].mean(axis=1))
+    avg = a + b
+    avg *= 0.5
+    only_a = np.isnan(b)
+    avg[only_a] = a[only_a]
+    only_b = np.isnan(a)
+    avg[only_b] = b[only_b]
+    return avg
+
+def aqi_to_codes(aqi):
+    # float AQI (whole numbers, NaN for missing) -> uint16 with aqi_missing for NaN
+    aqi = np.asarray(aqi, dtype=np.float64)
+    return np.where(np.isnan(aqi), aqi_missing, aqi).astype(np.uint16)
+
+def codes_to_aqi(codes):
+    # uint16 AQI -> float64 with NaN for missing, for plotting and averaging
+    aqi = np.asarray(codes).astype(np.float64)
+    aqi[codes == aqi_missing] = np.nan
+    return aqi
+
+def column_array(df, column):
+    # Take a column out of df as a writable float64 array, so the frame no longer holds its own copy
+    return np.array(df.pop(column), dtype=np.float64)
+
+def compact_frame(df, a_column='pm2.5_atm_a', b_column='pm2.5_atm_b', extra_columns=()):
+    # Compact frame from a raw 10-minute read (time_stamp, A and B channels). The raw columns are taken out of df as they are used.
+    # The average and AQI are computed at float64 before the channels are stored as float32, so AQI matches add_derived_columns exactly.
+    # extra_columns (e.g. humidity_a) are kept as float32
+    compact = pd.DataFrame({'epoch_ns': utc_epoch_ns(df['time_stamp'])})
+    a = clean_in_place(column_array(df, a_column))
+    b = clean_in_place(column_array(df, b_column))
+    avg = average_channels(a, b)
+    compact['pm2.5_atm_a'] = a.astype(np.float32)
+    del a
+    compact['pm2.5_atm_b'] = b.astype(np.float32)
+    del b
+    compact['pm2.5 AQI'] = aqi_to_codes(pm25_to_aqi_array(avg))
+    compact['pm2.5 Avg'] = avg.astype(np.float32)
+    del avg
+    for column in extra_columns:
+        compact[column] = df[column].to_numpy(dtype=np.float32)
+    return compact
+
+def expand_frame(compact, timezone='US/Central'):
+    # The usual working columns (time_stamp, Central_time_stamp, float64 pm2.5 Avg and AQI) from a compact frame, e.g. for plotting or rollups
+    return pd.DataFrame({
+        'time_stamp': pd.to_datetime(compact['epoch_ns'].to_numpy(), unit='ns', utc=True),
+        'Central_time_stamp': to_local_timestamps(compact['epoch_ns'].to_numpy(), timezone),
+        'pm2.5 Avg': compact['pm2.5 Avg'].to_numpy(dtype=np.float64),
+        'pm2.5 AQI': codes_to_aqi(compact['pm2.5 AQI'].to_numpy()),
+    })
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Memory report -------------------------------------------------------------------------------------------------------------------------------------------------
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+class MemoryReport:
+    # Footprint of the working frame after each stage: record() it, then print the report
+    def __init__(self):
+        self.rows = []
+
+    def record(self, stage, df):
+        n_bytes = frame_bytes(df)
+        self.rows.append({'stage': stage, 'rows': len(df), 'columns': df.shape[1], 'MB': n_bytes / 1e6,
+                          'bytes/row': n_bytes / len(df) if len(df) else np.nan})
+        return df
+
+    def table(self):
+        return pd.DataFrame(self.rows).set_index('stage')
+
+    def columns(self, df):
+        # Bytes per column of one frame, largest first
+        return df.memory_usage(deep=True, index=False).sort_values(ascending=False).rename('bytes')
+
+    def __str__(self):
+        return self.table().to_string(float_format='{:.1f}'.format)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Compare the two layouts on an archive -------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Compact.py 2019-12-01_2025-05-01_10-Minute_Average.csv
+    from AirQuality_Cache import read_csv_cached
+    from AirQuality_Incremental import add_derived_columns
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else '2019-12-01_2025-05-01_10-Minute_Average.csv'
+    report = MemoryReport()
+
+    start = time.perf_counter()
+    wide = report.record('read', read_csv_cached(csv_file, parse_dates=['time_stamp']))
+    wide = report.record('derived (float64 layout)', add_derived_columns(wide.copy(), timezone='US/Central'))
+    compact = report.record('compact', compact_frame(read_csv_cached(csv_file, parse_dates=['time_stamp'])))
+
+    # The compact frame gives the same AQI and average as the float64 layout
+    aqi = codes_to_aqi(compact['pm2.5 AQI'].to_numpy())
+    same_aqi = np.array_equal(aqi, wide['pm2.5 AQI'].to_numpy(), equal_nan=True)
+    max_avg_error = np.nanmax(np.abs(compact['pm2.5 Avg'].to_numpy(dtype=np.float64) - wide['pm2.5 Avg'].to_numpy()))
+    print(report)
+    print(f"AQI identical: {same_aqi}, largest float32 average error: {max_avg_error:.2g} µg/m³ ({time.perf_counter() - start:.2f} s)")
+    print(report.columns(compact))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,133 @@
+# AirQuality_Decimate.py
+# Description: Downsampling for the time-series figures, so ~300k 10-minute points don't all go to ax.plot. Two methods: per-pixel min/max (keeps
+# every spike and gap exactly as they would be drawn) and Largest-Triangle-Three-Buckets (keeps the overall shape with a fixed number of points).
+# plot_decimated draws the downsampled line and re-decimates whenever the x-axis limits change, so zooming in shows full detail.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+
+from AirQuality_Profile import stage
+
+### Decimation methods --------------------------------------------------------------------------------------------------------------------------------------------
+def minmax_decimate(x, y, n_bins):
+    # Split the x range into n_bins equal columns (one per pixel) and keep the lowest and highest point in each, plus the first and last point.
+    # NaN counts as neither, so a column with only NaN keeps a NaN point and gaps in the data stay gaps in the line. Returns the kept indices
+    n = len(x)
+    if n <= 2 * n_bins + 2:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(x[0], x[-1], n_bins + 1)
+    bin_id = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, n_bins - 1)
+    starts = np.flatnonzero(np.r_[True, bin_id[1:] != bin_id[:-1]])  # First point of each non-empty column
+    point_bin = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+
+    keep = [np.array([0, n - 1])]
+    for fill, reduce in [(np.inf, np.minimum), (-np.inf, np.maximum)]:
+        filled = np.where(np.isnan(y), fill, y)
+        extreme = reduce.reduceat(filled, starts)
+        hits = np.flatnonzero(filled == extreme[point_bin])
+        _, first_hit = np.unique(point_bin[hits], return_index=True)
+        keep.append(hits[first_hit])
+    return np.unique(np.concatenate(keep))
+
+def lttb_decimate(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: one point per bucket, the one making the largest triangle with the point kept from the previous
+    # bucket and the average of the next bucket. NaN points are skipped. Returns the kept indices
+    finite = np.flatnonzero(~np.isnan(np.asarray(y, dtype=np.float64)))
+    n = len(finite)
+    if n <= n_out or n_out < 3:
+        return finite
+    x = np.asarray(x, dtype=np.float64)[finite]
+    y = np.asarray(y, dtype=np.float64)[finite]
+    x = x - x[0]  # Keeps precision for large epoch values
+
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)  # Buckets between the fixed first and last point
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        cx = x[next_lo:next_hi].mean()
+        cy = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return finite[kept]
+
+def decimate(x, y, n_points, method='minmax'):
+    if method == 'minmax':
+        return minmax_decimate(x, y, max(n_points // 2, 1))
+    if method == 'lttb':
+        return lttb_decimate(x, y, n_points)
+    raise ValueError(f"Unknown decimation method '{method}', use 'minmax' or 'lttb'")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Plot with decimation ------------------------------------------------------------------------------------------------------------------------------------------
+def set_decimated_data(line, x, y, method='minmax', max_points=None):
+    # Put the decimated (x, y) on an existing line and keep it decimated when the x-axis limits change. Calling it again on the same
+    # line swaps in new data (e.g. the next year of a reused panel). x can be time stamps (timezone-aware or not) or numbers.
+    # max_points defaults to two points per pixel of axes width
+    ax = line.axes
+    y = np.asarray(y, dtype=np.float64)
+    is_time = pd.api.types.is_datetime64_any_dtype(x)
+    if is_time:
+        times = pd.DatetimeIndex(x)
+        tz = times.tz
+        x_values = times.to_numpy(dtype='datetime64[ns]').view(np.int64)  # UTC nanoseconds
+    else:
+        x_values = np.asarray(x, dtype=np.float64)
+    order = np.argsort(x_values, kind='stable')
+    if np.any(order != np.arange(len(order))):
+        x_values, y = x_values[order], y[order]  # Decimation needs x in order
+
+    def points_for(lo, hi):
+        # Decimated points between index lo and hi, in the same type the caller passed in
+        if max_points is None:
+            n_points = max(int(2 * ax.bbox.width), 200)
+        else:
+            n_points = max_points
+        idx = lo + decimate(x_values[lo:hi], y[lo:hi], n_points, method)
+        if is_time:
+            x_out = pd.to_datetime(x_values[idx], unit='ns', utc=True)
+            x_out = x_out.tz_convert(tz) if tz is not None else x_out.tz_localize(None)
+        else:
+            x_out = x_values[idx]
+        return x_out, y[idx]
+
+    def redecimate(axes):
+        # Only the visible window (plus one point each side so the line runs off the edges) is decimated again
+        x_lo, x_hi = axes.get_xlim()
+        if is_time:
+            x_lo = pd.Timestamp(mdates.num2date(x_lo)).value
+            x_hi = pd.Timestamp(mdates.num2date(x_hi)).value
+        lo = max(np.searchsorted(x_values, x_lo, side='left') - 1, 0)
+        hi = min(np.searchsorted(x_values, x_hi, side='right') + 1, len(x_values))
+        if hi - lo >= 2:
+            line.set_data(*points_for(lo, hi))
+            axes.figure.canvas.draw_idle()
+
+    x_out, y_out = points_for(0, len(x_values))
+    if is_time:
+        ax.xaxis.update_units(x_out)  # Lets the axis convert time stamps even if the line started out empty
+    line.set_data(x_out, y_out)
+
+    previous = getattr(line, 'decimation_callback', None)
+    if previous is not None:
+        ax.callbacks.disconnect(previous)
+    line.decimation_callback = ax.callbacks.connect('xlim_changed', redecimate)
+    return line
+
+def plot_decimated(ax, x, y, method='minmax', max_points=None, **plot_kwargs):
+    # Drop-in for ax.plot(x, y, **plot_kwargs) on long time series. Returns the Line2D
+    with stage('plotting', rows=len(y)):
+        line, = ax.plot([], [], **plot_kwargs)
+        set_decimated_data(line, x, y, method, max_points)
+        ax.relim()
+        ax.autoscale_view()
+    return line
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
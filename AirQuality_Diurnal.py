@@ -0,0 +1,147 @@
+# AirQuality_Diurnal.py
+# Description: Hour-of-day (diurnal) statistics for the box plots. hourly_stats computes the count, min, quartiles, median, mean and max for all 24 hours
+# in one grouped pass (one stable sort on the hour, then a partial sort of each hour's block), instead of 24 boolean masks over the archive. DiurnalDigest gives the same
+# statistics approximately from a stream of chunks (a small t-digest per hour), so multi-year or multi-sensor data never has to be held in memory.
+# bxp_stats turns either result into the boxes ax.bxp draws.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Profile import instrumented
+
+stat_columns = ['count', 'min', 'q1', 'median', 'q3', 'max', 'mean']  # Same columns as StreamAggregates.hourly_summary (AirQuality_Stream.py)
+
+### Exact statistics in one grouped pass --------------------------------------------------------------------------------------------------------------------------
+@instrumented('grouping', rows=lambda stats: int(stats['count'].sum()))
+def hourly_stats(values, hours, n_groups=24):
+    # Per-hour statistics of values (NaN skipped). Quartiles and median match np.percentile (linear interpolation)
+    values = np.asarray(values, dtype=np.float64)
+    hours = np.asarray(hours, dtype=np.int64)
+    valid = ~np.isnan(values)
+    values, hours = values[valid], hours[valid]
+
+    # Group once: a stable sort on the small integer hour puts each hour's values in one contiguous block
+    order = np.argsort(hours.astype(np.int16), kind='stable')
+    grouped = values[order]
+    counts = np.bincount(hours, minlength=n_groups)
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    sums = np.bincount(hours, weights=values, minlength=n_groups)
+
+    # Min, quartiles, median and max of each block (np.percentile only partially sorts, so this stays linear)
+    quantiles = np.full((n_groups, 5), np.nan)
+    for h in np.flatnonzero(counts):
+        quantiles[h] = np.percentile(grouped[bounds[h]:bounds[h + 1]], [0, 25, 50, 75, 100])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return pd.DataFrame({
+        'count': counts,
+        'min': quantiles[:, 0],
+        'q1': quantiles[:, 1],
+        'median': quantiles[:, 2],
+        'q3': quantiles[:, 3],
+        'max': quantiles[:, 4],
+        'mean': means,
+    }, index=pd.RangeIndex(n_groups, name='hour'))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Streaming approximate statistics (t-digest) -------------------------------------------------------------------------------------------------------------------
+def compress_centroids(means, weights, compression):
+    # Merge sorted centroids into at most ~compression clusters. Cluster sizes follow the t-digest k1 scale (arcsin), so clusters are
+    # small near the tails and large near the median, which keeps the quartiles and extremes accurate
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    cumulative = np.cumsum(weights)
+    q_mid = (cumulative - weights / 2) / cumulative[-1]
+    cluster = np.floor(compression * (np.arcsin(2 * q_mid - 1) / np.pi + 0.5)).astype(np.int64)
+    cluster_weights = np.bincount(cluster, weights=weights)
+    cluster_sums = np.bincount(cluster, weights=weights * means)
+    used = cluster_weights > 0
+    return cluster_sums[used] / cluster_weights[used], cluster_weights[used]
+
+def digest_quantile(means, weights, minimum, maximum, q):
+    # Interpolate between centroid centres. A weight-1 centroid sits exactly at its rank, so small digests give np.percentile's answer
+    n = weights.sum()
+    if n == 0:
+        return np.nan
+    ranks = np.concatenate([[0], np.cumsum(weights) - weights / 2 - 0.5, [n - 1]])
+    points = np.concatenate([[minimum], means, [maximum]])
+    return float(np.interp(q * (n - 1), ranks, points))
+
+class DiurnalDigest:
+    # Approximate per-hour statistics from chunks of data. Memory is 24 x ~compression centroids, whatever the number of rows.
+    # Count, min, max and mean are exact; quartiles and median are approximate
+    def __init__(self, compression=200, n_groups=24):
+        self.compression = compression
+        self.n_groups = n_groups
+        self.means = [np.empty(0) for _ in range(n_groups)]
+        self.weights = [np.empty(0) for _ in range(n_groups)]
+        self.count = np.zeros(n_groups, dtype=np.int64)
+        self.total = np.zeros(n_groups)
+        self.minimum = np.full(n_groups, np.inf)
+        self.maximum = np.full(n_groups, -np.inf)
+
+    def update(self, values, hours):
+        values = np.asarray(values, dtype=np.float64)
+        hours = np.asarray(hours, dtype=np.int64)
+        valid = ~np.isnan(values)
+        values, hours = values[valid], hours[valid]
+        if len(values) == 0:
+            return self
+
+        # Exact parts, all hours at once
+        self.count += np.bincount(hours, minlength=self.n_groups)
+        self.total += np.bincount(hours, weights=values, minlength=self.n_groups)
+        np.minimum.at(self.minimum, hours, values)
+        np.maximum.at(self.maximum, hours, values)
+
+        # New values join each hour's digest as weight-1 centroids, then the digest is compressed again
+        order = np.argsort(hours, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(hours, minlength=self.n_groups))])
+        grouped = values[order]
+        for h in range(self.n_groups):
+            new = grouped[bounds[h]:bounds[h + 1]]
+            if len(new) == 0:
+                continue
+            means = np.concatenate([self.means[h], new])
+            weights = np.concatenate([self.weights[h], np.ones(len(new))])
+            self.means[h], self.weights[h] = compress_centroids(means, weights, self.compression)
+        return self
+
+    def merge(self, other):
+        # Combine two digests (e.g. from different sensors or worker processes)
+        self.count += other.count
+        self.total += other.total
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        for h in range(self.n_groups):
+            if len(other.means[h]) > 0:
+                self.means[h], self.weights[h] = compress_centroids(np.concatenate([self.means[h], other.means[h]]),
+                                                                    np.concatenate([self.weights[h], other.weights[h]]), self.compression)
+        return self
+
+    def stats(self):
+        rows = []
+        for h in range(self.n_groups):
+            if self.count[h] == 0:
+                rows.append({'count': 0, 'min': np.nan, 'q1': np.nan, 'median': np.nan, 'q3': np.nan, 'max': np.nan, 'mean': np.nan})
+                continue
+            quantile = lambda q: digest_quantile(self.means[h], self.weights[h], self.minimum[h], self.maximum[h], q)
+            rows.append({'count': int(self.count[h]), 'min': self.minimum[h], 'q1': quantile(0.25), 'median': quantile(0.5),
+                         'q3': quantile(0.75), 'max': self.maximum[h], 'mean': self.total[h] / self.count[h]})
+        return pd.DataFrame(rows, columns=stat_columns, index=pd.RangeIndex(self.n_groups, name='hour'))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Box plot input ------------------------------------------------------------------------------------------------------------------------------------------------
+def bxp_stats(stats, labels=None):
+    # One box per row of stats for ax.bxp. Whiskers run from min to max (the same as boxplot with whis=[0, 100]), so there are no fliers
+    boxes = []
+    for i, (hour, row) in enumerate(stats.iterrows()):
+        boxes.append({
+            'label': labels[i] if labels is not None else str(hour),
+            'whislo': row['min'], 'q1': row['q1'], 'med': row['median'], 'q3': row['q3'], 'whishi': row['max'],
+            'mean': row['mean'], 'fliers': np.empty(0),
+        })
+    return boxes
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,143 @@
+# AirQuality_EPA.py
+# Description: Comparison of PurpleAir daily data with EPA daily data (daily_avg_EPA_pm25_*.csv) for any number of years and sites. Days are joined as
+# integer day numbers, and the regression of EPA on PurpleAir (slope, intercept, R², RMSE, bias) is computed for every site/year pair at once from
+# grouped sums. Bootstrap confidence intervals resample every pair in the same batched arrays instead of looping over resamples.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import glob
+
+import numpy as np
+import pandas as pd
+
+# PurpleAir daily column and EPA csv column for each quantity compared
+epa_quantities = {
+    'concentration': ('pm2.5 Avg', 'Daily Mean PM2.5 Concentration'),
+    'aqi': ('pm2.5 AQI', 'Daily AQI Value'),
+}
+fit_columns = ['n', 'slope', 'intercept', 'r2', 'rmse', 'bias']
+pair_columns = ['site', 'year', 'day', 'purpleair', 'epa']
+
+### Daily tables keyed on day numbers -----------------------------------------------------------------------------------------------------------------------------
+def day_keys(times):
+    # Calendar day of each time stamp as days since 1970-01-01. Timezone-aware stamps use their local (wall clock) date
+    times = pd.DatetimeIndex(times)
+    if times.tz is not None:
+        times = times.tz_localize(None)
+    return times.values.astype('datetime64[D]').view(np.int64)
+
+def day_years(days):
+    return days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+
+def read_epa_daily(paths, site_id=None, poc=None):
+    # One table (day, concentration, aqi) from one or more EPA daily files. paths can be a glob pattern such as 'daily_avg_EPA_pm25_*.csv'.
+    # Files downloaded for several monitors have one row per monitor and day: site_id and poc keep one site or instrument (Site ID and POC
+    # columns), and whatever rows are left for a day are averaged. Where files overlap, the first file listed wins
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+    frames = []
+    for path in paths:
+        wanted = {'Date', 'Site ID', 'POC'} | {column for _, column in epa_quantities.values()}
+        epa = pd.read_csv(path, usecols=lambda name: name in wanted)
+        for column, value in [('Site ID', site_id), ('POC', poc)]:
+            if value is not None:
+                if column not in epa:
+                    raise ValueError(f"{path} has no '{column}' column to select {value} from")
+                epa = epa[epa[column].astype(str) == str(value)]
+        daily = pd.DataFrame({'day': day_keys(pd.to_datetime(epa['Date'], format='%m/%d/%Y')),
+                              **{quantity: epa[column].to_numpy(dtype=np.float64) for quantity, (_, column) in epa_quantities.items()}})
+        frames.append(daily.groupby('day', as_index=False, sort=False).mean())  # Co-located monitors averaged per day
+    epa = pd.concat(frames, ignore_index=True)
+    return epa.drop_duplicates('day').sort_values('day', ignore_index=True)
+
+def purpleair_daily(daily_means, aqi_column='pm2.5 AQI'):
+    # The same layout from PurpleAir daily means indexed by local day (e.g. rollup_means in AirQuality_Rollup.py). aqi_column picks the daily
+    # AQI to compare, e.g. 'pm2.5 24h AQI' (AQI of the daily mean concentration, as EPA computes it) instead of the mean of the row AQI values
+    columns = {'concentration': epa_quantities['concentration'][0], 'aqi': aqi_column}
+    return pd.DataFrame({'day': day_keys(daily_means.index),
+                         **{quantity: daily_means[column].to_numpy(dtype=np.float64) for quantity, column in columns.items()}})
+
+def comparison_pairs(sites, quantity='aqi', years=None):
+    # Matched daily values for every site. sites maps a site name to (PurpleAir daily table, EPA daily table). Days missing on either side,
+    # or without a finite value, are dropped. Returns site, year, day, purpleair, epa sorted by site, year and day (no rows if nothing matches)
+    frames = []
+    for site, (purpleair, epa) in sites.items():
+        _, pa_rows, epa_rows = np.intersect1d(purpleair['day'].to_numpy(), epa['day'].to_numpy(), assume_unique=True, return_indices=True)
+        days = purpleair['day'].to_numpy()[pa_rows]
+        x = purpleair[quantity].to_numpy()[pa_rows]
+        y = epa[quantity].to_numpy()[epa_rows]
+        keep = np.isfinite(x) & np.isfinite(y)
+        if years is not None:
+            keep &= np.isin(day_years(days), list(years))
+        frames.append(pd.DataFrame({'site': site, 'year': day_years(days[keep]), 'day': days[keep], 'purpleair': x[keep], 'epa': y[keep]}))
+    if not frames:
+        return pd.DataFrame(columns=pair_columns)
+    return pd.concat(frames, ignore_index=True).sort_values(['site', 'year', 'day'], ignore_index=True)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Batched regression --------------------------------------------------------------------------------------------------------------------------------------------
+def fit_from_sums(n, sx, sy, sxx, sxy, syy):
+    # Least-squares line y = slope * x + intercept and its statistics from sums, for arrays of any shape (one element per fit).
+    # bias is the mean of PurpleAir minus EPA
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cxx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        slope = cxy / cxx
+        intercept = (sy - slope * sx) / n
+        r2 = cxy * cxy / (cxx * cyy)
+        rmse = np.sqrt(np.maximum(cyy - slope * cxy, 0) / n)
+        bias = (sx - sy) / n
+    return {'n': n, 'slope': slope, 'intercept': intercept, 'r2': r2, 'rmse': rmse, 'bias': bias}
+
+def group_codes(pairs):
+    # Group number of each row (pairs is sorted by site and year, so each group is one contiguous block) and the (site, year) of each group
+    keys = pairs[['site', 'year']]
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), pd.MultiIndex.from_frame(keys)
+    new_group = np.r_[True, (keys.iloc[1:].to_numpy() != keys.iloc[:-1].to_numpy()).any(axis=1)]
+    codes = np.cumsum(new_group) - 1
+    index = pd.MultiIndex.from_frame(keys[new_group].reset_index(drop=True))
+    return codes, index
+
+def batch_fit(pairs):
+    # One regression of EPA on PurpleAir per site and year, all computed together with bincount
+    codes, index = group_codes(pairs)
+    x = pairs['purpleair'].to_numpy(dtype=np.float64)
+    y = pairs['epa'].to_numpy(dtype=np.float64)
+    sums = [np.bincount(codes, weights=w, minlength=len(index)) for w in (np.ones_like(x), x, y, x * x, x * y, y * y)]
+    fits = pd.DataFrame(fit_from_sums(*sums), index=index, columns=fit_columns)
+    fits['n'] = fits['n'].astype(np.int64)
+    return fits
+
+def bootstrap_fit(pairs, n_boot=1000, confidence=0.95, seed=0, chunk_size=250):
+    # batch_fit plus percentile bootstrap confidence intervals (<stat>_low, <stat>_high). Each resample draws every group's rows with replacement
+    # from within the group; chunk_size resamples are drawn as one (chunk_size x rows) index array and summed per group with reduceat
+    fits = batch_fit(pairs)
+    if len(fits) == 0:
+        return fits.assign(**{f'{stat}_{end}': np.float64(np.nan) for stat in fit_columns[1:] for end in ('low', 'high')})
+    codes, _ = group_codes(pairs)
+    x = pairs['purpleair'].to_numpy(dtype=np.float64)
+    y = pairs['epa'].to_numpy(dtype=np.float64)
+    counts = fits['n'].to_numpy()
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    row_start, row_count = starts[codes], counts[codes]
+
+    rng = np.random.default_rng(seed)
+    resampled = {stat: [] for stat in fit_columns[1:]}
+    for done in range(0, n_boot, chunk_size):
+        size = min(chunk_size, n_boot - done)
+        idx = row_start + (rng.random((size, len(x))) * row_count).astype(np.int64)
+        xs, ys = x[idx], y[idx]
+        sums = [np.add.reduceat(w, starts, axis=1) for w in (xs, ys, xs * xs, xs * ys, ys * ys)]
+        stats = fit_from_sums(counts.astype(np.float64), *sums)
+        for stat in resampled:
+            resampled[stat].append(stats[stat])
+
+    tail = (1 - confidence) / 2 * 100
+    for stat, chunks in resampled.items():
+        low, high = np.nanpercentile(np.concatenate(chunks), [tail, 100 - tail], axis=0)
+        fits[f'{stat}_low'] = low
+        fits[f'{stat}_high'] = high
+    return fits
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
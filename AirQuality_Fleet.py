@@ -0,0 +1,139 @@
+# AirQuality_Fleet.py
+# Description: Fleet mode: run the whole pipeline (clean A/B channels -> A/B average -> AQI -> rollups) for many sensors at once. Sensors are listed in
+# a manifest csv with their export file (or SD card folder), column schema and time zone. Each sensor is one task in a process pool and only a small
+# summary row comes back from each worker, so throughput grows with the number of cores. Every sensor gets its own output folder (rollups, daily
+# means, yearly summary) and the fleet gets one combined summary table.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Incremental import add_derived_columns
+from AirQuality_Reader import detect_schema, read_sensor_csv, sensor_schemas
+from AirQuality_Rollup import rollup_means, rollup_summary, update_rollups
+from AirQuality_SD_ingest import load_sd_folder
+
+# Manifest example (one row per sensor; path is relative to the manifest file):
+#   sensor,path,schema,timezone
+#   Cherokee,2019-12-01_2025-05-01_10-Minute_Average.csv,10-minute,US/Central
+#   Durham,Durham_SD,sd,US/Eastern
+# schema is one of the sensor_schemas in AirQuality_Reader.py, or auto to find it from the file's header
+
+### Manifest ------------------------------------------------------------------------------------------------------------------------------------------------------
+def read_manifest(path):
+    manifest = pd.read_csv(path, dtype=str)
+    missing = {'sensor', 'path'} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"Manifest {path} is missing column(s): {', '.join(sorted(missing))}")
+    if 'schema' not in manifest:
+        manifest['schema'] = '10-minute'
+    if 'timezone' not in manifest:
+        manifest['timezone'] = 'US/Central'
+    manifest = manifest.fillna({'schema': '10-minute', 'timezone': 'US/Central'})
+    unknown = set(manifest['schema']) - set(sensor_schemas) - {'auto'}
+    if unknown:
+        raise ValueError(f"Unknown schema(s) {', '.join(sorted(unknown))}, use one of {', '.join(sensor_schemas)} or auto")
+    base = os.path.dirname(os.path.abspath(path))
+    manifest['path'] = [p if os.path.isabs(p) else os.path.join(base, p) for p in manifest['path']]
+    return manifest.to_dict('records')
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### One sensor (runs in a worker process) -------------------------------------------------------------------------------------------------------------------------
+def read_sensor(path, schema, timezone):
+    # UTC time_stamp plus the A and B channels, whatever the export looks like (only those columns are parsed, see AirQuality_Reader.py)
+    columns = sensor_schemas[schema]
+    if os.path.isdir(path):
+        df = load_sd_folder(path, workers=1, time_column=columns['time'])  # Already one process per sensor
+        return pd.DataFrame({'time_stamp': df[columns['time']], 'a': df[columns['a']], 'b': df[columns['b']]}).dropna(subset=['time_stamp'])
+    return read_sensor_csv(path, schema, timezone)
+
+def derive_sensor(df, units, timezone):
+    # Clean, average and convert to AQI. AQI channels (SD cards) are cleaned at 500 and averaged straight into pm2.5 AQI
+    if units == 'concentration':
+        df = df.rename(columns={'a': 'pm2.5_atm_a', 'b': 'pm2.5_atm_b'})
+        return add_derived_columns(df, timezone)
+    df['Central_time_stamp'] = df['time_stamp'].dt.tz_convert(timezone)
+    df['pm2.5 Avg'] = np.nan
+    df['pm2.5 AQI'] = df[['a', 'b']].where(df[['a', 'b']] <= 500, np.nan).mean(axis=1)
+    return df
+
+def process_sensor(task):
+    # Full pipeline for one sensor. Returns one summary row; a sensor that fails is reported in the summary instead of stopping the fleet
+    sensor, timezone = task['sensor'], task['timezone']
+    start = time.perf_counter()
+    row = {'sensor': sensor, 'schema': task['schema'], 'timezone': timezone}
+    try:
+        schema = detect_schema(task['path']) if task['schema'] == 'auto' else task['schema']
+        row['schema'] = schema
+        df = read_sensor(task['path'], schema, timezone)
+        df = derive_sensor(df, sensor_schemas[schema]['units'], timezone)
+
+        sensor_dir = os.path.join(task['out_dir'], sensor)
+        os.makedirs(sensor_dir, exist_ok=True)
+        rollups = update_rollups(os.path.join(sensor_dir, 'rollups'), df, timezone, source=task['path'])
+        daily = rollup_means(rollups, 'day')
+        daily.to_csv(os.path.join(sensor_dir, f'{sensor}_daily.csv'), index_label='date')
+        yearly = rollup_summary(rollups, 'year')
+        yearly.index = yearly.index.year
+        yearly.columns = [f'{column} {stat}' for column, stat in yearly.columns]
+        yearly.to_csv(os.path.join(sensor_dir, f'{sensor}_yearly.csv'), index_label='year')
+
+        year_totals = rollups['year']
+        aqi_count = year_totals[('pm2.5 AQI', 'count')].sum()
+        avg_count = year_totals[('pm2.5 Avg', 'count')].sum()
+        row.update({
+            'rows': len(df),
+            'valid_rows': int(aqi_count),
+            'first_time_stamp': df['time_stamp'].min(),
+            'last_time_stamp': df['time_stamp'].max(),
+            'days': int(daily['pm2.5 AQI'].notna().sum()),
+            'mean_pm2.5': year_totals[('pm2.5 Avg', 'sum')].sum() / avg_count if avg_count else np.nan,
+            'mean_aqi': year_totals[('pm2.5 AQI', 'sum')].sum() / aqi_count if aqi_count else np.nan,
+            'max_aqi': year_totals[('pm2.5 AQI', 'max')].max(),
+            'max_daily_aqi': daily['pm2.5 AQI'].max(),
+            'error': '',
+        })
+    except Exception as error:
+        row['error'] = f'{type(error).__name__}: {error}'
+    row['seconds'] = time.perf_counter() - start
+    return row
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Whole fleet ---------------------------------------------------------------------------------------------------------------------------------------------------
+def run_fleet(manifest, out_dir, workers=None):
+    # Process every sensor in the manifest (path or list of rows), in parallel unless workers == 1. Writes and returns the combined summary
+    sensors = read_manifest(manifest) if isinstance(manifest, str) else manifest
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [{**sensor, 'out_dir': out_dir} for sensor in sensors]
+    if workers == 1:
+        rows = [process_sensor(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(process_sensor, tasks))  # One sensor per task; biggest exports should come first in the manifest
+    summary = pd.DataFrame(rows).set_index('sensor')
+    summary.to_csv(os.path.join(out_dir, 'fleet_summary.csv'))
+    return summary
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Fleet.py sensors.csv --out fleet --workers 8
+    parser = argparse.ArgumentParser(description='Run the Purple Air pipeline for every sensor in a manifest.')
+    parser.add_argument('manifest', help='csv with sensor, path, schema and timezone columns')
+    parser.add_argument('--out', default='fleet', help='Output folder (one subfolder per sensor)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU core)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = run_fleet(args.manifest, args.out, args.workers)
+    print(summary.drop(columns=['schema']).to_string(float_format='{:.2f}'.format))
+    failed = summary['error'].fillna('') != ''
+    print(f"{len(summary) - failed.sum()} of {len(summary)} sensors processed in {time.perf_counter() - start:.1f} s, "
+          f"summary in {os.path.join(os.path.abspath(args.out), 'fleet_summary.csv')}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,225 @@
+# AirQuality_Grid.py
+# Description: Puts a sensor's rows on a regular grid of fixed time steps (10 minutes for the export, the logging interval for the SD card files).
+# Slot i covers [start + i * step, start + (i + 1) * step); rows in the same slot are averaged and slots without rows stay NaN, with explicit masks for
+# slots that had rows and slots with a valid value, and a report of every gap. On the grid a time or a time range is found with integer arithmetic
+# (O(1), no search), and windows are plain array views: fixed blocks (hours, UTC days) are a reshape and trailing windows a sliding window view.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Profile import stage
+from AirQuality_Time import time_to_epoch_ns, to_local_timestamps, utc_epoch_ns
+
+ns_per_second = 10**9
+grid_columns = ['pm2.5_atm_a_clean', 'pm2.5_atm_b_clean', 'pm2.5 Avg']
+
+### Grid ----------------------------------------------------------------------------------------------------------------------------------------------------------
+def detect_step(epoch_ns):
+    # Logging interval of a sensor: the most common gap between consecutive time stamps, to the second
+    diffs = np.diff(np.unique(np.asarray(epoch_ns, dtype=np.int64)))
+    if len(diffs) == 0:
+        raise ValueError('Need at least two different time stamps to find the logging interval')
+    seconds, counts = np.unique(np.round(diffs / ns_per_second).astype(np.int64), return_counts=True)
+    return int(seconds[np.argmax(counts)]) * ns_per_second
+
+class TimeGrid:
+    # Columns on a regular grid. columns maps a name to a float64 array with one value per slot; counts is the number of rows in each slot
+    def __init__(self, start_ns, step_ns, columns, counts, timezone='US/Central'):
+        self.start_ns = int(start_ns)
+        self.step_ns = int(step_ns)
+        self.columns = columns
+        self.counts = counts
+        self.timezone = timezone
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def end_ns(self):
+        return self.start_ns + len(self) * self.step_ns
+
+    @property
+    def present(self):
+        # Slots with at least one row
+        return self.counts > 0
+
+    def valid(self, name):
+        # Slots with a value for this column
+        return ~np.isnan(self.columns[name])
+
+    def times(self, slots=slice(None)):
+        # Local start time of each slot
+        return to_local_timestamps(self.start_ns + np.arange(len(self))[slots] * self.step_ns, self.timezone)
+
+    # Lookups: integer arithmetic on the grid start and step
+    def index_of(self, time):
+        # Slot holding a time (local if it has no zone, see time_to_epoch_ns). Can be outside 0..len - 1 for times off the grid
+        return (time_to_epoch_ns(time, self.timezone) - self.start_ns) // self.step_ns
+
+    def slots(self, start=None, end=None):
+        # Slots from start up to (not including) end, clipped to the grid. None means the start or end of the grid
+        first = 0 if start is None else -(-(time_to_epoch_ns(start, self.timezone) - self.start_ns) // self.step_ns)
+        last = len(self) if end is None else -(-(time_to_epoch_ns(end, self.timezone) - self.start_ns) // self.step_ns)
+        first, last = min(max(first, 0), len(self)), min(max(last, 0), len(self))
+        return slice(first, max(first, last))
+
+    def values(self, name, start=None, end=None):
+        # A column between two times, as a view (no copy)
+        return self.columns[name][self.slots(start, end)]
+
+    def frame(self, start=None, end=None):
+        # The grid (or part of it) as a DataFrame indexed by local slot start time
+        slots = self.slots(start, end)
+        return pd.DataFrame({'rows': self.counts[slots], **{name: values[slots] for name, values in self.columns.items()}},
+                            index=self.times(slots).rename(f'{self.timezone} time'))
+
+def align_to_grid(epoch_ns, columns, step_ns, timezone='US/Central', start_ns=None, end_ns=None):
+    # Put rows (epoch_ns plus a dict of value arrays, in any order) on the grid from start_ns (default: the first row, rounded down to a step) to
+    # end_ns (default: just after the last row). Rows outside are dropped, rows sharing a slot are averaged over their valid values
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    start_ns = epoch_ns.min() // step_ns * step_ns if start_ns is None else start_ns
+    end_ns = epoch_ns.max() + 1 if end_ns is None else end_ns
+    n_slots = int(-(-(end_ns - start_ns) // step_ns))
+    slot = (epoch_ns - start_ns) // step_ns
+    inside = (slot >= 0) & (slot < n_slots)
+    slot = slot[inside]
+
+    counts = np.bincount(slot, minlength=n_slots)
+    gridded = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)[inside]
+        valid = ~np.isnan(values)
+        sums = np.bincount(slot[valid], weights=values[valid], minlength=n_slots)
+        n = np.bincount(slot[valid], minlength=n_slots)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gridded[name] = np.where(n > 0, sums / n, np.nan)
+    return TimeGrid(start_ns, step_ns, gridded, counts, timezone)
+
+def grid_frame(df, timezone='US/Central', step_ns=None, time_column='time_stamp', columns=grid_columns):
+    # Grid of a derived frame (see add_derived_columns): the cleaned channels and their average, plus the AQI of each slot's average.
+    # step_ns defaults to the sensor's own logging interval
+    with stage('grid', rows=len(df)):
+        epoch_ns = utc_epoch_ns(df[time_column])
+        step_ns = detect_step(epoch_ns) if step_ns is None else step_ns
+        grid = align_to_grid(epoch_ns, {name: df[name].to_numpy() for name in columns}, step_ns, timezone)
+        if 'pm2.5 Avg' in grid.columns:
+            grid.columns['pm2.5 AQI'] = pm25_to_aqi_array(grid.columns['pm2.5 Avg'])
+        return grid
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Gaps ----------------------------------------------------------------------------------------------------------------------------------------------------------
+def mask_runs(mask):
+    # First slot and length of every run of True in a boolean array
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+def gap_report(grid, name=None, min_slots=1):
+    # Every run of at least min_slots empty slots (or slots without a value for column name): local start and end, slots and hours missing
+    missing = ~grid.present if name is None else ~grid.valid(name)
+    starts, lengths = mask_runs(missing)
+    keep = lengths >= min_slots
+    starts, lengths = starts[keep], lengths[keep]
+    return pd.DataFrame({
+        'start': grid.times(starts),
+        'end': grid.times(starts + lengths - 1) + pd.Timedelta(grid.step_ns, unit='ns'),
+        'slots': lengths,
+        'hours': lengths * grid.step_ns / 3.6e12,
+    })
+
+def coverage(grid):
+    # Share of slots with rows, and with a value, per column
+    return pd.Series({'rows': grid.present.mean(), **{name: grid.valid(name).mean() for name in grid.columns}}, name='coverage')
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Window statistics ---------------------------------------------------------------------------------------------------------------------------------------------
+def block_stats(grid, name, block_slots, start=None, end=None):
+    # Count, mean, min, max and completeness of each block of block_slots slots (e.g. 6 for hours, 144 for UTC days on the 10-minute grid),
+    # from a (blocks x block_slots) reshape of the column. Blocks start on multiples of block_slots steps since 1970-01-01 UTC (whole UTC hours
+    # and days), so slots before the first boundary and a last, partial block are left out
+    slots = grid.slots(start, end)
+    first_ns = grid.start_ns + slots.start * grid.step_ns
+    slots = slice(min(slots.start + (-first_ns // grid.step_ns) % block_slots, slots.stop), slots.stop)
+    values = grid.columns[name][slots]
+    n_blocks = len(values) // block_slots
+    blocks = values[:n_blocks * block_slots].reshape(n_blocks, block_slots)  # A view
+    valid = ~np.isnan(blocks)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, blocks, 0.0).sum(axis=1) / count
+    low = np.where(valid, blocks, np.inf).min(axis=1)
+    high = np.where(valid, blocks, -np.inf).max(axis=1)
+    first_slots = np.arange(slots.start, slots.start + n_blocks * block_slots, block_slots)
+    return pd.DataFrame({
+        'count': count,
+        'mean': mean,
+        'min': np.where(count > 0, low, np.nan),
+        'max': np.where(count > 0, high, np.nan),
+        'completeness': count / block_slots,
+    }, index=grid.times(first_slots).rename(f'{grid.timezone} time'))
+
+def rolling_stats(grid, name, window_slots):
+    # Trailing window of window_slots slots ending at every slot: count, mean, min and max. The mean comes from cumulative sums; min and max
+    # from a sliding window view of the column (NaN filled once, no copy per window). Slots before the first full window are NaN
+    values = grid.columns[name]
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    count = np.full(len(values), np.nan)
+    mean = np.full(len(values), np.nan)
+    low = np.full(len(values), np.nan)
+    high = np.full(len(values), np.nan)
+    if len(values) >= window_slots:
+        end = np.arange(window_slots, len(values) + 1)
+        n = counts[end] - counts[end - window_slots]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean[window_slots - 1:] = (sums[end] - sums[end - window_slots]) / n
+        count[window_slots - 1:] = n
+        low[window_slots - 1:] = sliding_window_view(np.where(valid, values, np.inf), window_slots).min(axis=1)
+        high[window_slots - 1:] = sliding_window_view(np.where(valid, values, -np.inf), window_slots).max(axis=1)
+        empty = count == 0
+        low[empty], high[empty] = np.nan, np.nan
+    return pd.DataFrame({'count': count, 'mean': mean, 'min': low, 'max': high}, index=grid.times().rename(f'{grid.timezone} time'))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Examples: python AirQuality_Grid.py --csv 2019-12-01_2025-05-01_10-Minute_Average.csv
+    #           python AirQuality_Grid.py --sd SD_card_folder
+    from AirQuality_Cache import read_csv_cached
+    from AirQuality_Incremental import add_derived_columns
+
+    parser = argparse.ArgumentParser(description='Put a sensor on a regular time grid and list the gaps.')
+    parser.add_argument('--csv', default=None, help='10-minute export')
+    parser.add_argument('--sd', default=None, help='Folder of SD card files')
+    parser.add_argument('--timezone', default='US/Central')
+    parser.add_argument('--step', type=int, default=None, help='Grid step in seconds (default: the logging interval)')
+    parser.add_argument('--min-gap', type=int, default=6, help='Only report gaps of at least this many slots')
+    args = parser.parse_args()
+
+    step_ns = None if args.step is None else args.step * ns_per_second
+    if args.sd is not None:
+        from AirQuality_SD_ingest import load_sd_folder
+        sd = load_sd_folder(args.sd)
+        columns = ['pm2.5_aqi_atm', 'pm2.5_aqi_atm_b']
+        grid = grid_frame(sd, args.timezone, step_ns, time_column='UTCDateTime', columns=columns)
+    else:
+        csv_file = args.csv or '2019-12-01_2025-05-01_10-Minute_Average.csv'
+        df = add_derived_columns(read_csv_cached(csv_file, parse_dates=['time_stamp']), timezone=args.timezone)
+        grid = grid_frame(df, args.timezone, step_ns)
+        columns = grid_columns
+
+    print(f"{len(grid)} slots of {grid.step_ns // ns_per_second} s from {grid.times(slice(0, 1))[0]}")
+    print(coverage(grid).to_string())
+    gaps = gap_report(grid, min_slots=args.min_gap)
+    print(f"{len(gaps)} gaps of at least {args.min_gap} slots, {gaps['hours'].sum():.1f} hours in total")
+    print(gaps.sort_values('slots', ascending=False).head(10).to_string(index=False))
+    hourly = block_stats(grid, columns[-1], 3600 * ns_per_second // grid.step_ns)
+    print(hourly.dropna().head(5).to_string())
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
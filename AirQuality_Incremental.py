@@ -0,0 +1,151 @@
+# AirQuality_Incremental.py
+# Description: Incremental ingest for the Purple Air 10-minute export. The cleaned A/B channels, their average, AQI and local time stamp are kept in a
+# store folder of binary parts. Each refresh remembers the last time_stamp it processed, so only rows after it are parsed and computed and saved as a
+# new part. When the new download starts with the exact same bytes as the last one, only the new tail of the csv is read at all.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Cache import load_table, save_table, feather
+from AirQuality_Profile import stage
+from AirQuality_Time import parse_time_columns
+
+### Derived columns -----------------------------------------------------------------------------------------------------------------------------------------------
+def add_derived_columns(df, timezone='US/Central'):
+    # Convert Universal time zone into local time
+    with stage('tz conversion', rows=len(df)):
+        df['Central_time_stamp'] = df['time_stamp'].dt.tz_convert(timezone)
+
+    # Replace values > 500.4 with NaN
+    with stage('cleaning', rows=len(df)):
+        df['pm2.5_atm_a_clean'] = df['pm2.5_atm_a'].where(df['pm2.5_atm_a'] <= 500.4, np.nan)
+        df['pm2.5_atm_b_clean'] = df['pm2.5_atm_b'].where(df['pm2.5_atm_b'] <= 500.4, np.nan)
+
+    # Calculate row-wise average of the cleaned columns, then convert it to AQI
+    with stage('averaging', rows=len(df)):
+        df['pm2.5 Avg'] = df[['pm2.5_atm_a_clean', 'pm2.5_atm_b_clean']].mean(axis=1)
+    with stage('AQI', rows=len(df)):
+        df['pm2.5 AQI'] = pm25_to_aqi_array(df['pm2.5 Avg'])
+    return df
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Store state ---------------------------------------------------------------------------------------------------------------------------------------------------
+def state_path(store_dir):
+    return os.path.join(store_dir, 'state.json')
+
+def read_state(store_dir):
+    try:
+        with open(state_path(store_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'last_time_stamp': None, 'source_offset': 0, 'source_prefix_sha1': None, 'header': None, 'parts': [], 'rows': 0}
+
+def write_state(store_dir, state):
+    tmp_path = state_path(store_dir) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path(store_dir))
+
+def prefix_hash(path, n_bytes, block_size=1 << 20):
+    # SHA-1 of the first n_bytes of a file
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while n_bytes > 0:
+            block = f.read(min(block_size, n_bytes))
+            if not block:
+                break
+            h.update(block)
+            n_bytes -= len(block)
+    return h.hexdigest()
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Read only what is new -----------------------------------------------------------------------------------------------------------------------------------------
+def read_header(csv_path):
+    with open(csv_path, 'rb') as f:
+        return f.readline().decode('utf-8').strip().split(',')
+
+def ends_on_line_break(csv_path, offset):
+    with open(csv_path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+def read_new_rows(csv_path, state):
+    # Fast path: the new download starts with the bytes already processed, so parsing starts where the last refresh stopped.
+    # Otherwise the whole csv is parsed, but only rows after last_time_stamp go on to the (more expensive) derived columns
+    header = read_header(csv_path)
+    offset = state['source_offset']
+    same_prefix = (state['header'] == header and 0 < offset <= os.path.getsize(csv_path)
+                   and ends_on_line_break(csv_path, offset) and prefix_hash(csv_path, offset) == state['source_prefix_sha1'])
+    if same_prefix and offset == os.path.getsize(csv_path):
+        return pd.DataFrame(columns=header)  # Nothing new since the last refresh
+    if same_prefix:
+        with open(csv_path, 'rb') as f:
+            f.seek(offset)
+            new = pd.read_csv(f, header=None, names=header)
+    else:
+        new = pd.read_csv(csv_path)
+    parse_time_columns(new, ['time_stamp'])
+
+    if state['last_time_stamp'] is not None:
+        new = new[new['time_stamp'] > pd.Timestamp(state['last_time_stamp'])]
+    return new.drop_duplicates(subset='time_stamp').sort_values('time_stamp', ignore_index=True)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Update and load the store -------------------------------------------------------------------------------------------------------------------------------------
+def load_store(store_dir):
+    state = read_state(store_dir)
+    parts = [load_table(os.path.join(store_dir, part)) for part in state['parts']]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+def update_store(csv_path, store_dir, timezone='US/Central'):
+    # Add the rows of csv_path newer than the last refresh to the store. Returns the number of new rows and of rows in the store
+    os.makedirs(store_dir, exist_ok=True)
+    state = read_state(store_dir)
+    new = read_new_rows(csv_path, state)
+
+    if len(new) > 0:
+        new = add_derived_columns(new, timezone)
+        part = f"part-{len(state['parts']):05d}" + ('.feather' if feather is not None else '.pkl')
+        save_table(new, os.path.join(store_dir, part))
+        state['parts'].append(part)
+        state['last_time_stamp'] = new['time_stamp'].iloc[-1].isoformat()
+        state['rows'] += len(new)
+
+    # Remember how much of this download has been processed, so the next one can skip it
+    size = os.path.getsize(csv_path)
+    state['header'] = read_header(csv_path)
+    state['source_offset'] = size
+    state['source_prefix_sha1'] = prefix_hash(csv_path, size)
+    write_state(store_dir, state)
+    return len(new), state['rows']
+
+def compact_store(store_dir):
+    # Merge all parts into one, so loading reads a single file
+    state = read_state(store_dir)
+    if len(state['parts']) <= 1:
+        return
+    df = load_store(store_dir)
+    old_parts = state['parts']
+    part = 'part-compact' + ('.feather' if feather is not None else '.pkl')
+    save_table(df, os.path.join(store_dir, part))
+    state['parts'] = [part]
+    write_state(store_dir, state)
+    for old in old_parts:
+        if old != part:
+            os.remove(os.path.join(store_dir, old))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    # Usage: python AirQuality_Incremental.py <new 10-minute export csv> <store folder>
+    new_rows, store_rows = update_store(sys.argv[1], sys.argv[2])
+    print(f"{os.path.basename(sys.argv[1])}: {new_rows} new rows, {store_rows} rows in store")
@@ -0,0 +1,113 @@
+# AirQuality_NowCast.py
+# Description: EPA NowCast for PM2.5 over the whole archive. The 10-minute averages are first turned into hourly concentrations on a regular UTC hour
+# grid (missing hours stay NaN). Every hour then gets the 12-hour weighted average: weight factor w = 1 - (max - min) / max over the 12 hours,
+# at least 0.5, and hour i back weighted w**i. A NowCast needs 2 of the 3 most recent hours. All hours are done together on a (hours x 12)
+# sliding window view of the hourly array, and the NowCast concentrations go through the same AQI converter as the 10-minute data.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import sys
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Profile import stage
+from AirQuality_Time import ns_per_hour, utc_epoch_ns
+
+nowcast_hours = 12
+min_weight = 0.5  # Minimum weight factor for PM
+
+### Hourly concentrations -----------------------------------------------------------------------------------------------------------------------------------------
+def hourly_means(epoch_ns, values, min_rows=3):
+    # Mean of values in every UTC hour from the first to the last, as (hour start in epoch ns, mean, rows). Hours with fewer than min_rows
+    # valid rows (3 of the six 10-minute rows by default) are NaN
+    values = np.asarray(values, dtype=np.float64)
+    if len(epoch_ns) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+    valid = ~np.isnan(values)
+    hours = epoch_ns // ns_per_hour
+    first = hours.min()
+    slot = hours - first
+    n_hours = int(slot.max()) + 1
+    rows = np.bincount(slot[valid], minlength=n_hours)
+    sums = np.bincount(slot[valid], weights=values[valid], minlength=n_hours)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(rows >= min_rows, sums / rows, np.nan)
+    return (first + np.arange(n_hours)) * ns_per_hour, means, rows
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### NowCast -------------------------------------------------------------------------------------------------------------------------------------------------------
+def nowcast(hourly):
+    # NowCast concentration for every hour of a regular hourly array (NaN = missing hour). Row i of the window view holds hours i-11..i,
+    # reversed so column 0 is the current hour
+    hourly = np.asarray(hourly, dtype=np.float64)
+    if len(hourly) == 0:
+        return hourly.copy()
+    padded = np.concatenate([np.full(nowcast_hours - 1, np.nan), hourly])
+    windows = sliding_window_view(padded, nowcast_hours)[:, ::-1]  # A view: no copy of the 12 hours per row
+    valid = ~np.isnan(windows)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        c_max = np.nanmax(np.where(valid, windows, -np.inf), axis=1)
+        c_min = np.nanmin(np.where(valid, windows, np.inf), axis=1)
+        weight = np.where(c_max > 0, 1 - (c_max - c_min) / c_max, 1.0)
+    weight = np.clip(weight, min_weight, 1.0)
+
+    powers = weight[:, None] ** np.arange(nowcast_hours)  # w**0 for the current hour, w**11 for 11 hours back
+    powers = np.where(valid, powers, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = np.sum(powers * np.where(valid, windows, 0.0), axis=1) / np.sum(powers, axis=1)
+    enough_recent = valid[:, :3].sum(axis=1) >= 2
+    return np.where(enough_recent, result, np.nan)
+
+def truncate_tenths(concentration):
+    # EPA truncates NowCast PM2.5 to 0.1 µg/m³ before the AQI lookup (the small offset keeps values like 12.3 from becoming 12.2999...)
+    return np.floor(np.asarray(concentration) * 10 + 1e-9) / 10
+
+def nowcast_frame(df, timezone='US/Central', column='pm2.5 Avg', min_rows=3):
+    # Hourly concentration, NowCast and NowCast AQI for a 10-minute frame (time_stamp plus column). Indexed by the local start of each hour
+    with stage('NowCast', rows=len(df)):
+        hour_ns, hourly, rows = hourly_means(utc_epoch_ns(df['time_stamp']), df[column].to_numpy(), min_rows)
+        concentration = truncate_tenths(nowcast(hourly))
+        index = pd.to_datetime(hour_ns, unit='ns', utc=True).tz_convert(timezone)
+        return pd.DataFrame({
+            'rows': rows,
+            'pm2.5 hourly': hourly,
+            'NowCast': concentration,
+            'NowCast AQI': pm25_to_aqi_array(concentration),
+        }, index=index.rename(f'{timezone} hour'))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Check against the step-by-step EPA calculation ----------------------------------------------------------------------------------------------------------------
+def nowcast_reference(hourly, i):
+    # NowCast for hour i written out as in the EPA technical note, one hour at a time (slow, for checking)
+    window = [hourly[i - k] if i - k >= 0 else np.nan for k in range(nowcast_hours)]
+    if sum(not np.isnan(c) for c in window[:3]) < 2:
+        return np.nan
+    present = [c for c in window if not np.isnan(c)]
+    c_max, c_min = max(present), min(present)
+    weight = max(1 - (c_max - c_min) / c_max, min_weight) if c_max > 0 else 1.0
+    numerator = sum(weight ** k * c for k, c in enumerate(window) if not np.isnan(c))
+    denominator = sum(weight ** k for k, c in enumerate(window) if not np.isnan(c))
+    return numerator / denominator
+
+if __name__ == '__main__':
+    # Example: python AirQuality_NowCast.py 2019-12-01_2025-05-01_10-Minute_Average.csv
+    import time
+    from AirQuality_Cache import read_csv_cached
+    from AirQuality_Incremental import add_derived_columns
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else '2019-12-01_2025-05-01_10-Minute_Average.csv'
+    df = add_derived_columns(read_csv_cached(csv_file, parse_dates=['time_stamp']), timezone='US/Central')
+    start = time.perf_counter()
+    hourly = nowcast_frame(df)
+    print(f"NowCast for {len(hourly)} hours in {time.perf_counter() - start:.3f} s")
+
+    sample = np.random.default_rng(0).choice(len(hourly), 2000, replace=False)
+    reference = np.array([nowcast_reference(hourly['pm2.5 hourly'].to_numpy(), i) for i in sample])
+    vectorized = nowcast(hourly['pm2.5 hourly'].to_numpy())[sample]
+    print(f"Matches the hour-by-hour calculation: {np.allclose(reference, vectorized, equal_nan=True)}")
+    print(hourly.dropna().head(12).to_string())
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,239 @@
+# AirQuality_Pipeline.py
+# Description: The load -> clean -> average -> AQI steps and everything the reports build on them (local time fields, rollups, daily means, hourly
+# statistics, EPA comparison) as one graph of named stages. A stage runs only when something asks for it, runs its inputs first, and keeps its
+# result, so each stage is computed at most once per input file. get_pipeline hands every caller in the same process the same Pipeline for the
+# same inputs, which lets the time series, EPA comparison and box plot reports run together from one ingest (see the command line below).
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import os
+import runpy
+import sys
+
+from AirQuality_Archive import open_archive
+from AirQuality_Cache import cache_folder, read_csv_cached
+from AirQuality_Calibration import calibrated_frame, calibration_key, fit_calibrations
+from AirQuality_Diurnal import hourly_stats
+from AirQuality_EPA import bootstrap_fit, comparison_pairs, purpleair_daily, read_epa_daily
+from AirQuality_Grid import grid_frame
+from AirQuality_Incremental import add_derived_columns, load_store, update_store
+from AirQuality_NowCast import nowcast_frame
+from AirQuality_Profile import stage
+from AirQuality_QA import run_qa
+from AirQuality_Query import TimeQuery
+from AirQuality_Rolling import daily_mean_aqi, rolling_24h
+from AirQuality_Rollup import rollup_means, rollup_summary, update_rollups
+from AirQuality_Time import local_time_fields
+
+### Stage graph ---------------------------------------------------------------------------------------------------------------------------------------------------
+pipeline_stages = {}  # Stage name -> (function, names of the stages it takes as inputs)
+
+def pipeline_stage(name, *inputs):
+    # Register a stage. The function gets the pipeline (for its settings) and the results of its input stages
+    def register(function):
+        pipeline_stages[name] = (function, inputs)
+        return function
+    return register
+
+class Pipeline:
+    # Lazily evaluated, memoized stages for one sensor export. pipeline['daily'] computes 'daily' and whatever it needs, once
+    def __init__(self, csv_file, timezone='US/Central', site='Cherokee', epa_files='daily_avg_EPA_pm25_*.csv', incremental=False,
+                 cache_dir=cache_folder):
+        self.csv_file = csv_file
+        self.timezone = timezone
+        self.site = site
+        self.epa_files = epa_files
+        self.incremental = incremental
+        self.cache_dir = cache_dir
+        self.results = {}
+        self.calibrated_results = {}  # Calibration table key -> corrected frame, next to the raw 'derived' frame
+
+    def __getitem__(self, name):
+        if name not in self.results:
+            if name not in pipeline_stages:
+                raise KeyError(f"Unknown pipeline stage '{name}', use one of {', '.join(pipeline_stages)}")
+            function, inputs = pipeline_stages[name]
+            values = [self[input_name] for input_name in inputs]
+            self.results[name] = function(self, *values)
+        return self.results[name]
+
+    def computed(self):
+        # Names of the stages already run, in the order they finished
+        return list(self.results)
+
+    def invalidate(self, name=None):
+        # Forget a stage and every stage built on it (or everything), e.g. after the csv has grown
+        if name is None:
+            self.results.clear()
+            self.calibrated_results.clear()
+            return
+        self.results.pop(name, None)
+        if name == 'derived':
+            self.calibrated_results.clear()
+        for other, (_, inputs) in pipeline_stages.items():
+            if name in inputs and other in self.results:
+                self.invalidate(other)
+
+    def calibrated(self, table):
+        # The derived frame with this site's rows of a calibration table applied (see AirQuality_Calibration.py). Every table used is kept, so
+        # switching between calibrations reuses both the raw frame and the corrected frames instead of reading the csv again
+        table = table[table['sensor'] == self.site].reset_index(drop=True)
+        if len(table) == 0:
+            raise ValueError(f"Calibration table has no corrections for site '{self.site}'")
+        key = calibration_key(table)
+        if key not in self.calibrated_results:
+            self.calibrated_results[key] = calibrated_frame(self['derived'], table, self.timezone)
+        return self.calibrated_results[key]
+
+    def store_path(self, kind):
+        # Per-site folder in the cache for the incremental store and the rollups
+        return os.path.join(self.cache_dir, f'{self.site}_{kind}')
+
+pipelines = {}  # One Pipeline per set of inputs in this process
+
+def get_pipeline(csv_file, timezone='US/Central', site='Cherokee', epa_files='daily_avg_EPA_pm25_*.csv', incremental=False, cache_dir=cache_folder):
+    # The shared Pipeline for these inputs, made the first time it is asked for
+    key = (os.path.abspath(csv_file), timezone, site, epa_files, incremental, os.path.abspath(cache_dir))
+    if key not in pipelines:
+        pipelines[key] = Pipeline(csv_file, timezone, site, epa_files, incremental, cache_dir)
+    return pipelines[key]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Stages --------------------------------------------------------------------------------------------------------------------------------------------------------
+@pipeline_stage('derived')
+def derived_stage(pipeline):
+    # Central time stamp, cleaned A/B channels (> 500.4 replaced with NaN), their average and its AQI
+    if pipeline.incremental:
+        store_dir = pipeline.store_path('10-Minute_store')
+        update_store(pipeline.csv_file, store_dir, pipeline.timezone)
+        return load_store(store_dir)
+    df = read_csv_cached(pipeline.csv_file, parse_dates=['time_stamp'], cache_dir=pipeline.cache_dir)
+    return add_derived_columns(df, timezone=pipeline.timezone)
+
+@pipeline_stage('archive')
+def archive_stage(pipeline):
+    # Memory-mapped column files with year/month offsets, for reading single years without the whole table (see AirQuality_Archive.py)
+    return open_archive(pipeline.csv_file, pipeline.cache_dir, pipeline.timezone)
+
+@pipeline_stage('local_fields', 'derived')
+def local_fields_stage(pipeline, df):
+    # Local hour, date and year of every row
+    with stage('local time fields', rows=len(df)):
+        return local_time_fields(df['time_stamp'], pipeline.timezone)
+
+@pipeline_stage('query', 'derived')
+def query_stage(pipeline, df):
+    # Time range queries on the derived frame by binary search (see AirQuality_Query.py)
+    return TimeQuery(df, timezone=pipeline.timezone)
+
+@pipeline_stage('rollups', 'derived')
+def rollups_stage(pipeline, df):
+    return update_rollups(pipeline.store_path('rollups'), df, timezone=pipeline.timezone, source=pipeline.csv_file)
+
+@pipeline_stage('daily', 'rollups')
+def daily_stage(pipeline, rollups):
+    # Daily mean concentration, mean of the row AQI values, and AQI of the daily mean concentration (days at least 75% complete), indexed by local day
+    daily = rollup_means(rollups, 'day', timezone=pipeline.timezone)
+    counts = rollups['day'][('pm2.5 Avg', 'count')].reindex(daily.index.tz_localize(None), fill_value=0)
+    daily['pm2.5 24h AQI'] = daily_mean_aqi(daily['pm2.5 Avg'], counts.to_numpy()).to_numpy()
+    daily.index.name = 'Central_time_stamp'
+    return daily
+
+@pipeline_stage('grid', 'derived')
+def grid_stage(pipeline, df):
+    # The channels, average and AQI on a regular grid at the logging interval, with gap masks (see AirQuality_Grid.py)
+    return grid_frame(df, pipeline.timezone)
+
+@pipeline_stage('rolling_24h', 'derived')
+def rolling_24h_stage(pipeline, df):
+    # Trailing 24-hour mean concentration and its AQI at every 10-minute row (see AirQuality_Rolling.py)
+    return rolling_24h(df)
+
+@pipeline_stage('yearly_summary', 'rollups')
+def yearly_summary_stage(pipeline, rollups):
+    yearly = rollup_summary(rollups, 'year')
+    yearly.index = yearly.index.year
+    return yearly
+
+@pipeline_stage('hourly_aqi_stats', 'derived', 'local_fields')
+def hourly_aqi_stats_stage(pipeline, df, fields):
+    # Box plot statistics of AQI for every local hour of the day
+    return hourly_stats(df['pm2.5 AQI'], fields['hour'])
+
+@pipeline_stage('nowcast', 'derived')
+def nowcast_stage(pipeline, df):
+    # Hourly concentration, NowCast and NowCast AQI (see AirQuality_NowCast.py)
+    return nowcast_frame(df, pipeline.timezone)
+
+@pipeline_stage('qa', 'derived')
+def qa_stage(pipeline, df):
+    # Per-row A/B channel flags and per-day channel health (see AirQuality_QA.py)
+    return run_qa(df, pipeline.timezone)
+
+@pipeline_stage('qa_flags', 'qa')
+def qa_flags_stage(pipeline, qa):
+    return qa[0]
+
+@pipeline_stage('qa_daily', 'qa')
+def qa_daily_stage(pipeline, qa):
+    return qa[1]
+
+@pipeline_stage('epa_daily')
+def epa_daily_stage(pipeline):
+    return read_epa_daily(pipeline.epa_files)
+
+@pipeline_stage('epa_pairs', 'daily', 'epa_daily')
+def epa_pairs_stage(pipeline, daily, epa_daily):
+    return comparison_pairs({pipeline.site: (purpleair_daily(daily, aqi_column='pm2.5 24h AQI'), epa_daily)}, quantity='aqi')
+
+@pipeline_stage('epa_fits', 'epa_pairs')
+def epa_fits_stage(pipeline, pairs):
+    # Regression per year with bootstrap confidence intervals
+    return bootstrap_fit(pairs)
+
+@pipeline_stage('epa_calibrations', 'derived', 'epa_daily')
+def epa_calibrations_stage(pipeline, df, epa_daily):
+    # Linear correction of the concentration per year, fitted on the EPA daily means
+    return fit_calibrations(df, epa_daily, pipeline.site, pipeline.timezone, method='linear')
+
+@pipeline_stage('calibrated', 'epa_calibrations')
+def calibrated_stage(pipeline, calibrations):
+    # Concentration and AQI with the EPA-fitted corrections applied; other tables go through pipeline.calibrated(table)
+    return pipeline.calibrated(calibrations)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### All report variants in one run --------------------------------------------------------------------------------------------------------------------------------
+report_scripts = {
+    'timeseries': 'AirQuality_Cherokee_convert.py',
+    'epa': 'AirQuality_Cherokee_convertvEPAcompare.py',
+    'boxplot': 'AirQuality_Cherokee_convertvBoxPlot.py',
+}
+
+if __name__ == '__main__':
+    # Example: python AirQuality_Pipeline.py --reports timeseries epa boxplot --out report
+    # Every report script asks get_pipeline for the same inputs, so the csv is read and converted once for all of them
+    parser = argparse.ArgumentParser(description='Run several report scripts in one process, sharing one ingest.')
+    parser.add_argument('--reports', nargs='+', default=list(report_scripts), choices=list(report_scripts))
+    parser.add_argument('--out', default=None, help='Save every figure here as PNG instead of showing the windows')
+    args = parser.parse_args()
+
+    import matplotlib
+    if args.out is not None:
+        matplotlib.use('Agg')
+        os.makedirs(args.out, exist_ok=True)
+    import matplotlib.pyplot as plt
+
+    # The report scripts import this module by name, so this file running as __main__ must not hold a second set of pipelines
+    import AirQuality_Pipeline
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, script_dir)
+    for report in args.reports:
+        runpy.run_path(os.path.join(script_dir, report_scripts[report]), run_name='__main__')
+        if args.out is not None:
+            for number in plt.get_fignums():
+                plt.figure(number).savefig(os.path.join(args.out, f'{report}_figure{number}.png'))
+            plt.close('all')
+    for pipeline in AirQuality_Pipeline.pipelines.values():
+        print(f"{pipeline.csv_file}: stages computed once each: {', '.join(pipeline.computed())}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
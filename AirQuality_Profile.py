@@ -0,0 +1,255 @@
+# AirQuality_Profile.py
+# Description: Per-stage instrumentation for the processing pipeline. The shared modules mark their stages (load, tz conversion, cleaning, averaging,
+# AQI, resampling, grouping, plotting) with stage() or @instrumented. Those cost nothing until an Instrumentation is activated. While one is active,
+# each stage records wall time, CPU time, peak memory and row count. The results come out as JSON and as a terminal summary, and any stage
+# can also be run under cProfile (or pyinstrument, a sampling profiler, if installed). Running this file on a script instruments the whole run.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import runpy
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+try:
+    import pyinstrument  # Optional sampling profiler
+except ImportError:
+    pyinstrument = None
+
+active = None  # Instrumentation currently recording; None means stages are not measured
+
+### Stage records -------------------------------------------------------------------------------------------------------------------------------------------------
+class StageRecord:
+    # One measured stage. Code inside the stage can set rows (e.g. record.rows = len(df)) if the row count isn't known up front
+    def __init__(self, name, rows=None, depth=0):
+        self.name = name
+        self.rows = rows
+        self.depth = depth
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_MB = None
+        self.peak_increase_MB = None
+        self.max_rss_MB = None
+        self.profile = None
+        self.child_peak = 0
+
+    def as_dict(self):
+        return {key: value for key, value in vars(self).items() if key != 'child_peak'}
+
+def max_rss_MB():
+    # Highest resident memory of the process so far (kilobytes on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Instrumentation -----------------------------------------------------------------------------------------------------------------------------------------------
+class Instrumentation:
+    # Records every stage run while it is active. trace_memory uses tracemalloc for per-stage peaks (NumPy and pandas buffers are included).
+    # Tracing slows allocation-heavy code (matplotlib drawing most of all) several times over, so time with trace_memory=False and measure
+    # memory in a separate run. profile_stages lists the stage names to run under the profiler
+    def __init__(self, trace_memory=True, profile_stages=(), profiler='cprofile', profile_dir=None, profile_lines=20):
+        if profiler == 'pyinstrument' and pyinstrument is None:
+            raise ImportError("profiler='pyinstrument' needs the pyinstrument package (pip install pyinstrument)")
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.profile_lines = profile_lines
+        self.records = []
+        self.stack = []
+        self.previous = None
+
+    def activate(self):
+        # Make this the instrumentation every stage() and @instrumented reports to
+        global active
+        self.previous, active = active, self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def deactivate(self):
+        global active
+        active = self.previous
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, *exc_info):
+        self.deactivate()
+
+    @contextmanager
+    def stage(self, name, rows=None, profile=False):
+        record = StageRecord(name, rows, depth=len(self.stack))
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak)  # Keep the enclosing stage's peak before resetting it
+            tracemalloc.reset_peak()
+            start_memory = current
+        profiler = self.start_profiler() if profile or name in self.profile_stages else None
+
+        self.stack.append(record)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - start_wall
+            record.cpu_seconds = time.process_time() - start_cpu
+            self.stack.pop()
+            if profiler is not None:
+                record.profile = self.stop_profiler(profiler, name)
+            if tracing:
+                peak = max(tracemalloc.get_traced_memory()[1], record.child_peak)
+                record.peak_MB = peak / 1e6
+                record.peak_increase_MB = (peak - start_memory) / 1e6
+                if self.stack:
+                    self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak)
+                tracemalloc.reset_peak()
+            record.max_rss_MB = max_rss_MB()
+            self.records.append(record)
+
+    def start_profiler(self):
+        if self.profiler == 'pyinstrument':
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def stop_profiler(self, profiler, name):
+        # Top functions as text; the full profile is saved to profile_dir if one is given
+        file_name = name.replace(' ', '_').replace('/', '-')
+        if self.profiler == 'pyinstrument':
+            profiler.stop()
+            if self.profile_dir is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                with open(os.path.join(self.profile_dir, f'{file_name}.html'), 'w') as f:
+                    f.write(profiler.output_html())
+            return profiler.output_text()
+        profiler.disable()
+        if self.profile_dir is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f'{file_name}.prof'))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(self.profile_lines)
+        return text.getvalue()
+
+    def table(self):
+        # One row per stage name: calls, total wall/CPU time, rows processed and the largest memory peak
+        if not self.records:
+            return pd.DataFrame()
+        df = pd.DataFrame([record.as_dict() for record in self.records])
+        order = list(dict.fromkeys(df['name']))
+        return df.groupby('name', sort=False).agg(
+            calls=('name', 'size'),
+            wall_seconds=('wall_seconds', 'sum'),
+            cpu_seconds=('cpu_seconds', 'sum'),
+            rows=('rows', 'sum'),
+            peak_MB=('peak_MB', 'max'),
+            peak_increase_MB=('peak_increase_MB', 'max'),
+            max_rss_MB=('max_rss_MB', 'max'),
+        ).reindex(order)
+
+    def summary(self):
+        return self.table().to_string(float_format='{:.3f}'.format)
+
+    def to_json(self, path=None):
+        # Every stage run in order, plus the per-stage table. Returns the JSON text and writes it to path if given
+        text = json.dumps({
+            'stages': [record.as_dict() for record in self.records],
+            'summary': json.loads(self.table().reset_index().to_json(orient='records')),
+        }, indent=2, default=str)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Hooks for the pipeline code -----------------------------------------------------------------------------------------------------------------------------------
+class IdleStage:
+    # Stand-in record when nothing is recording, so "record.rows = ..." still works
+    rows = None
+
+@contextmanager
+def idle_stage():
+    yield IdleStage()
+
+def stage(name, rows=None, profile=False):
+    # with stage('clean', rows=len(df)): ... measured only while an Instrumentation is active
+    if active is None:
+        return idle_stage()
+    return active.stage(name, rows, profile)
+
+def instrumented(name, rows=len):
+    # Decorator form of stage(). rows is called on the function's result to count the rows (None to skip)
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return function(*args, **kwargs)
+            with active.stage(name) as record:
+                result = function(*args, **kwargs)
+                if rows is not None:
+                    try:
+                        record.rows = rows(result)
+                    except TypeError:
+                        pass
+                return result
+        return wrapper
+    return decorate
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Instrument a whole script -------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Profile.py AirQuality_Cherokee_convert.py --json run.json --profile AQI
+    parser = argparse.ArgumentParser(description='Run a script with per-stage instrumentation.')
+    parser.add_argument('script', help='Script to run (in the current folder, as if run directly)')
+    parser.add_argument('--json', default=None, help='Write the stage records to this JSON file')
+    parser.add_argument('--profile', nargs='*', default=[], help='Stage names to run under the profiler')
+    parser.add_argument('--profiler', default='cprofile', choices=['cprofile', 'pyinstrument'])
+    parser.add_argument('--profile-dir', default=None, help='Save full profiles of the profiled stages here')
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc: accurate times, but no per-stage memory peaks')
+    parser.add_argument('--show', action='store_true', help='Allow plt.show() windows (default: Agg backend, no windows)')
+    args = parser.parse_args()
+
+    if not args.show:
+        import matplotlib
+        matplotlib.use('Agg')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    sys.argv = [args.script]
+
+    # The pipeline modules report to the imported AirQuality_Profile module, not to this file running as __main__
+    import AirQuality_Profile
+    with AirQuality_Profile.Instrumentation(not args.no_memory, args.profile, args.profiler, args.profile_dir) as instrumentation:
+        with AirQuality_Profile.stage('total'):
+            runpy.run_path(args.script, run_name='__main__')
+
+    print(instrumentation.summary())
+    for record in instrumentation.records:
+        if record.profile:
+            print(f"\n### Profile: {record.name}\n{record.profile}")
+    if args.json is not None:
+        instrumentation.to_json(args.json)
+        print(f"Stage records written to {os.path.abspath(args.json)}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,198 @@
+# AirQuality_QA.py
+# Description: Quality checks on the A and B channels, run on the whole archive at once. Each row gets a bit mask of flags: channel over the 500.4 cap or
+# missing, A/B disagreement (absolute and relative difference), stuck channels (the same value repeated), flatlined channels (almost no change over
+# a window) and sudden jumps on one channel only. Every rolling window is O(n): sums and counts come from cumulative sums, and rolling min/max
+# from block prefix/suffix maxima (van Herk / Gil-Werman), so there is no per-row Python loop. daily_health sums the flags per local day.
+# Window sizes are in rows (10-minute rows by default).
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Profile import stage
+from AirQuality_Time import local_epoch_ns, ns_per_day, utc_epoch_ns
+
+# One bit per flag, so a row can carry several
+qa_flags = {
+    'a_over_limit': 1 << 0,
+    'b_over_limit': 1 << 1,
+    'a_missing': 1 << 2,
+    'b_missing': 1 << 3,
+    'disagree': 1 << 4,
+    'a_stuck': 1 << 5,
+    'b_stuck': 1 << 6,
+    'a_flat': 1 << 7,
+    'b_flat': 1 << 8,
+    'a_jump': 1 << 9,
+    'b_jump': 1 << 10,
+}
+qa_defaults = {
+    'limit': 500.4,  # µg/m³, same cap as the cleaning step
+    'abs_threshold': 5.0,  # A/B disagree when |A - B| > 5 µg/m³ ...
+    'rel_threshold': 0.7,  # ... and |A - B| / mean(A, B) > 70%
+    'stuck_rows': 12,  # Same value 12 rows (2 hours) in a row
+    'flat_window': 36,  # Less than flat_range change over 36 rows (6 hours)
+    'flat_range': 0.05,
+    'jump_window': 6,  # Compare each row with the mean and spread of the previous 6 rows (1 hour)
+    'jump_abs': 20.0,  # A jump is more than 20 µg/m³ and more than jump_sigma standard deviations away, on one channel only
+    'jump_sigma': 6.0,
+}
+
+### O(n) rolling windows ------------------------------------------------------------------------------------------------------------------------------------------
+def trailing_sums(values, window):
+    # Sum, sum of squares and count of the valid (non-NaN) values in the window rows before each row (the row itself not included)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    sums = np.concatenate([[0.0], np.cumsum(filled)])
+    squares = np.concatenate([[0.0], np.cumsum(filled * filled)])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    end = np.arange(len(values))
+    start = np.maximum(end - window, 0)
+    return sums[end] - sums[start], squares[end] - squares[start], counts[end] - counts[start]
+
+def rolling_max(values, window, fill=-np.inf):
+    # Max of the window rows ending at each row, in O(n) for any window: blocks of `window` rows get a running max from the left and from the
+    # right, and every window is covered by the right part of one block and the left part of the next. NaN counts as fill
+    n = len(values)
+    padded = np.concatenate([np.full(window - 1, fill), np.where(np.isnan(values), fill, values)])
+    padded = np.concatenate([padded, np.full(-len(padded) % window, fill)]).reshape(-1, window)
+    from_left = np.maximum.accumulate(padded, axis=1).ravel()
+    from_right = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(from_right[:n], from_left[window - 1:window - 1 + n])
+
+def rolling_min(values, window):
+    return -rolling_max(-values, window)
+
+def spread_back(mask, window):
+    # Flag the window rows ending at each flagged row, i.e. the whole window, not just its last row
+    return rolling_max(mask[::-1].astype(np.float64), window, fill=0.0)[::-1] > 0
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Flags ---------------------------------------------------------------------------------------------------------------------------------------------------------
+def stuck_rows(values, min_rows):
+    # Rows in a run of at least min_rows identical values
+    valid = ~np.isnan(values)
+    starts = np.r_[True, (values[1:] != values[:-1]) | ~valid[1:] | ~valid[:-1]]
+    run_id = np.cumsum(starts) - 1
+    run_length = np.bincount(run_id)[run_id]
+    return valid & (run_length >= min_rows)
+
+def flat_rows(values, window, max_range):
+    # Rows in a window of `window` valid values whose max - min is at most max_range (a window with a missing value is never flat)
+    counts = np.concatenate([[0], np.cumsum(~np.isnan(values))])
+    full = np.zeros(len(values), dtype=bool)
+    full[window - 1:] = counts[window:] - counts[:len(values) - window + 1] == window  # Every value in the window is there
+    with np.errstate(invalid='ignore'):
+        spread = rolling_max(values, window) - rolling_min(values, window)
+    return spread_back(full & (spread <= max_range), window)
+
+def jump_rows(values, other, window, jump_abs, jump_sigma):
+    # Rows far from the mean of the previous window rows on this channel, while the other channel stays within its own limits
+    def outlying(x):
+        sums, squares, counts = trailing_sums(x, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / counts
+            std = np.sqrt(np.maximum(squares / counts - mean * mean, 0))
+            return (counts >= window // 2 + 1) & (np.abs(x - mean) > np.maximum(jump_abs, jump_sigma * std))
+    return outlying(values) & ~outlying(other) & ~np.isnan(other)
+
+def channel_flags(a, b, **settings):
+    # Per-row bit mask (uint16) for A and B channel arrays. settings override qa_defaults
+    settings = {**qa_defaults, **settings}
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    flags = np.zeros(len(a), dtype=np.uint16)
+
+    def mark(name, mask):
+        flags[mask] |= qa_flags[name]
+
+    mark('a_over_limit', a > settings['limit'])
+    mark('b_over_limit', b > settings['limit'])
+    a_clean = np.where(a <= settings['limit'], a, np.nan)  # Other checks only look at values under the cap
+    b_clean = np.where(b <= settings['limit'], b, np.nan)
+    mark('a_missing', np.isnan(a))
+    mark('b_missing', np.isnan(b))
+
+    difference = np.abs(a_clean - b_clean)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relative = difference / ((a_clean + b_clean) / 2)
+    mark('disagree', (difference > settings['abs_threshold']) & (relative > settings['rel_threshold']))
+
+    for name, values in [('a', a_clean), ('b', b_clean)]:
+        mark(f'{name}_stuck', stuck_rows(values, settings['stuck_rows']))
+        mark(f'{name}_flat', flat_rows(values, settings['flat_window'], settings['flat_range']))
+    mark('a_jump', jump_rows(a_clean, b_clean, settings['jump_window'], settings['jump_abs'], settings['jump_sigma']))
+    mark('b_jump', jump_rows(b_clean, a_clean, settings['jump_window'], settings['jump_abs'], settings['jump_sigma']))
+    return flags
+
+def flag_names(flags):
+    # Readable list of flags for each row (for a few rows, e.g. when inspecting)
+    return [[name for name, bit in qa_flags.items() if flag & bit] for flag in np.asarray(flags)]
+
+def flag_counts(flags):
+    flags = np.asarray(flags)
+    return pd.Series({name: int(np.count_nonzero(flags & bit)) for name, bit in qa_flags.items()}, name='rows')
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Whole frame and daily health ----------------------------------------------------------------------------------------------------------------------------------
+def run_qa(df, timezone='US/Central', a_column='pm2.5_atm_a', b_column='pm2.5_atm_b', **settings):
+    # Flags for every row of a 10-minute frame (in time order) and the per-day health table
+    with stage('QA', rows=len(df)):
+        flags = channel_flags(df[a_column].to_numpy(), df[b_column].to_numpy(), **settings)
+        days = local_epoch_ns(utc_epoch_ns(df['time_stamp']), timezone) // ns_per_day
+        daily = daily_health(flags, df[a_column].to_numpy(), df[b_column].to_numpy(), days, settings.get('limit', qa_defaults['limit']))
+    return pd.Series(flags, index=df.index, name='qa_flags'), daily
+
+def daily_health(flags, a, b, days, limit=qa_defaults['limit']):
+    # Per local day: rows, valid rows per channel, rows with each flag, mean A/B difference and correlation, and the share of rows with any
+    # flag other than missing. status is 'good' under 5% flagged, 'fair' under 25%, otherwise 'poor'
+    a = np.where(np.asarray(a, dtype=np.float64) <= limit, a, np.nan)
+    b = np.where(np.asarray(b, dtype=np.float64) <= limit, b, np.nan)
+    day_ids, codes = np.unique(days, return_inverse=True)
+    n_days = len(day_ids)
+
+    def per_day(values):
+        return np.bincount(codes, weights=values, minlength=n_days)
+
+    both = ~np.isnan(a) & ~np.isnan(b)
+    a_both, b_both = np.where(both, a, 0.0), np.where(both, b, 0.0)
+    health = pd.DataFrame({
+        'rows': np.bincount(codes, minlength=n_days),
+        'a_valid': per_day(~np.isnan(a)).astype(np.int64),
+        'b_valid': per_day(~np.isnan(b)).astype(np.int64),
+    }, index=pd.Index(day_ids.astype('datetime64[D]'), name='date'))
+    for name, bit in qa_flags.items():
+        if not name.endswith('_missing'):
+            health[name] = per_day((flags & bit) > 0).astype(np.int64)
+
+    n = per_day(both)
+    sa, sb = per_day(a_both), per_day(b_both)
+    saa, sbb, sab = per_day(a_both * a_both), per_day(b_both * b_both), per_day(a_both * b_both)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        health['mean_abs_difference'] = per_day(np.abs(a_both - b_both)) / n
+        health['ab_correlation'] = (n * sab - sa * sb) / np.sqrt((n * saa - sa * sa) * (n * sbb - sb * sb))
+    missing_bits = qa_flags['a_missing'] | qa_flags['b_missing']
+    health['flagged_fraction'] = per_day((flags & ~np.uint16(missing_bits)) > 0) / health['rows']
+    health['status'] = np.select([health['flagged_fraction'] < 0.05, health['flagged_fraction'] < 0.25], ['good', 'fair'], 'poor')
+    return health
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_QA.py 2019-12-01_2025-05-01_10-Minute_Average.csv US/Central
+    import time
+    from AirQuality_Cache import read_csv_cached
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else '2019-12-01_2025-05-01_10-Minute_Average.csv'
+    timezone = sys.argv[2] if len(sys.argv) > 2 else 'US/Central'
+    df = read_csv_cached(csv_file, parse_dates=['time_stamp'])
+    start = time.perf_counter()
+    flags, daily = run_qa(df, timezone)
+    print(f"QA of {len(df)} rows in {time.perf_counter() - start:.3f} s")
+    print(flag_counts(flags).to_string())
+    print(daily['status'].value_counts().to_string())
+    print(daily[daily['status'] != 'good'].head(10).to_string())
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
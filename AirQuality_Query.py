@@ -0,0 +1,104 @@
+# AirQuality_Query.py
+# Description: Time range queries on a loaded sensor table without boolean masks over the whole table. The UTC time stamps are kept as one
+# sorted int64 array, and the rows between two times are found with two binary searches (searchsorted, O(log n)), so a year, a month or any
+# window is a contiguous slice of the rows: a view of the column arrays, and an iloc slice of the frame, with no copy of the data.
+# Times can be local (no zone given, taken in the site's time zone) or carry their own zone, e.g. '2024-01-01' or '2024-01-01T06:00:00Z'.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Time import local_epoch_ns, local_year, time_to_epoch_ns, utc_epoch_ns
+
+### Searches on a sorted time array -------------------------------------------------------------------------------------------------------------------------------
+def range_slice(epoch_ns, start=None, end=None, timezone='US/Central'):
+    # Rows from start up to (not including) end of a sorted epoch array. None means the first or last row
+    first = 0 if start is None else int(np.searchsorted(epoch_ns, time_to_epoch_ns(start, timezone), side='left'))
+    last = len(epoch_ns) if end is None else int(np.searchsorted(epoch_ns, time_to_epoch_ns(end, timezone), side='left'))
+    return slice(first, max(first, last))
+
+def year_slices(epoch_ns, timezone='US/Central'):
+    # (local year, slice of rows) for every year in a sorted epoch array, from one binary search per year boundary
+    if len(epoch_ns) == 0:
+        return []
+    first_year, last_year = local_year(local_epoch_ns(epoch_ns[[0, -1]], timezone))
+    years = np.arange(first_year, last_year + 1)
+    boundaries = np.array([time_to_epoch_ns(f'{year}-01-01', timezone) for year in np.append(years, last_year + 1)])
+    rows = np.searchsorted(epoch_ns, boundaries, side='left')
+    return [(int(year), slice(int(rows[i]), int(rows[i + 1]))) for i, year in enumerate(years) if rows[i + 1] > rows[i]]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Queries on a frame --------------------------------------------------------------------------------------------------------------------------------------------
+class TimeQuery:
+    # Time range queries on a frame with a UTC time column. The frame is put in time order once (if it isn't already); every query after that
+    # is two binary searches on the int64 time array
+    def __init__(self, df, time_column='time_stamp', timezone='US/Central'):
+        epoch_ns = utc_epoch_ns(df[time_column])
+        if np.any(np.diff(epoch_ns) < 0):
+            order = np.argsort(epoch_ns, kind='stable')
+            df = df.take(order)
+            epoch_ns = epoch_ns[order]
+        self.df = df
+        self.epoch_ns = epoch_ns
+        self.timezone = timezone
+
+    def __len__(self):
+        return len(self.epoch_ns)
+
+    def rows(self, start=None, end=None):
+        # Slice of the rows from start up to (not including) end
+        return range_slice(self.epoch_ns, start, end, self.timezone)
+
+    def between(self, start=None, end=None):
+        # The rows from start up to end as an iloc slice of the frame (copy-on-write: nothing is copied unless it is changed)
+        return self.df.iloc[self.rows(start, end)]
+
+    def column(self, name, start=None, end=None):
+        # One column between two times as a NumPy view
+        return self.df[name].to_numpy()[self.rows(start, end)]
+
+    def times(self, start=None, end=None):
+        # UTC epoch nanoseconds between two times (a view)
+        return self.epoch_ns[self.rows(start, end)]
+
+    def year(self, year):
+        # One local calendar year
+        return self.between(f'{year}-01-01', f'{year + 1}-01-01')
+
+    def month(self, year, month):
+        # One local calendar month
+        following = pd.Timestamp(year=year, month=month, day=1) + pd.DateOffset(months=1)
+        return self.between(f'{year}-{month:02d}-01', following.strftime('%Y-%m-%d'))
+
+    def years(self):
+        # (year, rows of that year) for every local year, in place of groupby('year')
+        return [(year, self.df.iloc[rows]) for year, rows in year_slices(self.epoch_ns, self.timezone)]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Check against boolean masks -----------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Query.py 2019-12-01_2025-05-01_10-Minute_Average.csv
+    import sys
+    import time
+    from AirQuality_Cache import read_csv_cached
+    from AirQuality_Incremental import add_derived_columns
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else '2019-12-01_2025-05-01_10-Minute_Average.csv'
+    df = add_derived_columns(read_csv_cached(csv_file, parse_dates=['time_stamp']), timezone='US/Central')
+    query = TimeQuery(df)
+
+    start = time.perf_counter()
+    mask = (df['Central_time_stamp'] >= '2024-01-01') & (df['Central_time_stamp'] < '2025-01-01')
+    masked = df[mask]
+    mask_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    sliced = query.year(2024)
+    query_seconds = time.perf_counter() - start
+    print(f"2024 by boolean mask: {mask_seconds * 1000:.2f} ms, by binary search: {query_seconds * 1000:.3f} ms")
+    print(f"Same rows: {masked.index.equals(sliced.index)}")
+    view = query.column('pm2.5 Avg', '2024-01-01', '2025-01-01')
+    print(f"Column slice shares memory with the frame: {np.shares_memory(view, df['pm2.5 Avg'].to_numpy())}")
+    for year, rows in query.years():
+        print(f"{year}: {len(rows)} rows, mean AQI {rows['pm2.5 AQI'].mean():.1f}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,138 @@
+# AirQuality_Reader.py
+# Description: One csv reader for the Purple Air column schemas: the 10-minute export (time_stamp, pm2.5_atm_a/b), the SD card files (UTCDateTime,
+# pm2.5_aqi_atm/_b) and the older A/B exports (DateTime, Funk A/B). The schema is found from the header line, and only the time column, the two
+# channels and any extra columns asked for are parsed (usecols), with explicit dtypes instead of inferred ones. Every schema comes back in the
+# same layout: UTC time_stamp, channels a and b, then the extra columns. The parse engine can be chosen; pyarrow (multithreaded) is used when
+# it is installed, otherwise the pandas C parser.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import hashlib
+import os
+import time
+
+import pandas as pd
+
+from AirQuality_Cache import read_csv_cached
+from AirQuality_Profile import instrumented
+from AirQuality_Time import parse_utc, time_formats
+
+try:
+    import pyarrow.csv  # Optional, multithreaded csv parser
+    default_engine = 'pyarrow'
+except ImportError:
+    default_engine = 'c'
+
+### Sensor schemas ------------------------------------------------------------------------------------------------------------------------------------------------
+# Time column, A and B channel columns, whether the channels are concentrations (µg/m³) or AQI, and whether the time column is UTC or local time
+sensor_schemas = {
+    '10-minute': {'time': 'time_stamp', 'a': 'pm2.5_atm_a', 'b': 'pm2.5_atm_b', 'units': 'concentration', 'utc': True},  # Purple Air 10-minute export
+    'sd': {'time': 'UTCDateTime', 'a': 'pm2.5_aqi_atm', 'b': 'pm2.5_aqi_atm_b', 'units': 'aqi', 'utc': True},  # SD card folder
+    'funk': {'time': 'DateTime', 'a': 'Funk A', 'b': 'Funk B', 'units': 'concentration', 'utc': False},  # Local-time A/B export
+}
+
+# dtypes of the extra columns we read (anything else is read as float64)
+column_dtypes = {
+    'sensor_index': 'int64',
+    'mac_address': 'str',
+    'humidity_a': 'float64',
+    'temperature_a': 'float64',
+    'pressure_a': 'float64',
+}
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Find the schema -----------------------------------------------------------------------------------------------------------------------------------------------
+def read_header(path):
+    # Column names from the first line of a csv (for a folder of SD card files, from its first file)
+    if os.path.isdir(path):
+        from AirQuality_SD_ingest import find_sd_files
+        files = find_sd_files(path)
+        if not files:
+            raise ValueError(f'No SD card files in {path}')
+        path = files[0]
+    with open(path, encoding='utf-8-sig') as f:  # utf-8-sig drops a byte order mark from Excel-saved files
+        return [name.strip().strip('"') for name in f.readline().rstrip('\r\n').split(',')]
+
+def detect_schema(path, header=None):
+    # Name of the schema whose time and channel columns are all in the header
+    header = set(read_header(path) if header is None else header)
+    for name, columns in sensor_schemas.items():
+        if {columns['time'], columns['a'], columns['b']} <= header:
+            return name
+    raise ValueError(f"{path} does not match a known schema ({', '.join(sensor_schemas)}); columns are {', '.join(sorted(header))}")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Read one csv --------------------------------------------------------------------------------------------------------------------------------------------------
+def read_options(columns, extra_columns, engine):
+    # usecols and dtypes for pd.read_csv. Time stamps are read as text and parsed with their known format afterwards
+    usecols = [columns['time'], columns['a'], columns['b']] + list(extra_columns)
+    dtype = {columns['time']: 'str', columns['a']: 'float64', columns['b']: 'float64',
+             **{column: column_dtypes.get(column, 'float64') for column in extra_columns}}
+    return {'usecols': usecols, 'dtype': dtype, 'engine': engine or default_engine}
+
+def projection_name(options):
+    # Cache name for one projection of a csv, so reads of different columns or with different engines keep their own cache
+    key = repr((options['usecols'], sorted(options['dtype'].items()), options['engine']))
+    return 'columns_' + hashlib.sha1(key.encode()).hexdigest()[:10]
+
+def to_utc(times, columns, timezone):
+    # UTC time stamps from the time column: UTC schemas as they are, local ones localized to timezone first. Both try the known formats
+    # and then let pandas infer the format; a column that has values but none that parse is an error, not an empty table
+    parsed = parse_utc(times, time_formats.get(columns['time']), utc=columns['utc'])
+    if not columns['utc']:
+        parsed = parsed.dt.tz_localize(timezone, ambiguous='NaT', nonexistent='NaT').dt.tz_convert('UTC')
+    if len(parsed) and parsed.isna().all():
+        raise ValueError(f"Could not parse any time stamps in column {columns['time']}, e.g. {times.iloc[0]!r}")
+    return parsed
+
+@instrumented('load')
+def read_sensor_csv(path, schema=None, timezone='US/Central', extra_columns=(), engine=None, cached=True):
+    # Normalized table (time_stamp in UTC, a, b, extra columns) from one csv. schema is found from the header when not given; extra columns
+    # missing from the file are skipped. With cached=True and pyarrow the projected table goes through the csv cache (AirQuality_Cache.py), kept
+    # apart from the cache of the full csv and of other column sets. The C parser reads the projection no faster than the whole file, so with
+    # it the columns are taken from the cache of the full csv (the same one the pipeline reads) instead of a second cache
+    header = read_header(path)
+    schema = detect_schema(path, header) if schema is None else schema
+    columns = sensor_schemas[schema]
+    extra_columns = [column for column in extra_columns if column in header]
+    options = read_options(columns, extra_columns, engine)
+    parse_dates = [columns['time']] if columns['utc'] else None
+    if cached and options['engine'] == 'pyarrow':
+        df = read_csv_cached(path, parse_dates=parse_dates, cache_name=projection_name(options), **options)
+    elif cached:
+        df = read_csv_cached(path, parse_dates=parse_dates)[options['usecols']]
+        df = df.astype({column: dtype for column, dtype in options['dtype'].items() if column != columns['time']})
+    else:
+        df = pd.read_csv(path, **options)
+    if columns['utc'] and pd.api.types.is_datetime64_any_dtype(df[columns['time']]):
+        time_stamp = df[columns['time']]
+    else:
+        time_stamp = to_utc(df[columns['time']], columns, timezone)
+    normalized = pd.DataFrame({'time_stamp': time_stamp, 'a': df[columns['a']], 'b': df[columns['b']],
+                               **{column: df[column] for column in extra_columns}})
+    return normalized.dropna(subset=['time_stamp']).reset_index(drop=True)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Compare with a full read --------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Reader.py 2019-12-01_2025-05-01_10-Minute_Average.csv --engine pyarrow
+    parser = argparse.ArgumentParser(description='Read a Purple Air csv of any known schema into the normalized layout.')
+    parser.add_argument('csv_file', nargs='?', default='2019-12-01_2025-05-01_10-Minute_Average.csv')
+    parser.add_argument('--engine', default=None, choices=['c', 'python', 'pyarrow'], help=f'Parse engine (default: {default_engine})')
+    parser.add_argument('--timezone', default='US/Central', help='Time zone of local-time schemas')
+    parser.add_argument('--extra', nargs='*', default=['humidity_a'], help='Extra columns to keep, if the file has them')
+    args = parser.parse_args()
+
+    schema = detect_schema(args.csv_file)
+    start = time.perf_counter()
+    full = pd.read_csv(args.csv_file)
+    parse_utc(full[sensor_schemas[schema]['time']], time_formats.get(sensor_schemas[schema]['time']))
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    df = read_sensor_csv(args.csv_file, schema, args.timezone, args.extra, args.engine, cached=False)
+    print(f"Schema '{schema}': full read {full_seconds:.3f} s, projected read ({args.engine or default_engine}) {time.perf_counter() - start:.3f} s")
+    print(f"{len(df)} rows, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB (full read {full.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    print(df.dtypes.to_string())
+    print(df.head(3).to_string())
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,72 @@
+# AirQuality_Rolling.py
+# Description: 24-hour mean concentration and its AQI. The EPA daily AQI is the AQI of the 24-hour mean concentration, not the mean of the
+# 10-minute AQI values. rolling_mean gives the trailing 24-hour mean at every 10-minute row in O(n): cumulative sums of the valid values and of
+# the valid-row counts, with each window's start found by binary search on the time stamps, so gaps shorten the window instead of stretching it.
+# A mean only counts when the window is complete enough (75% of the expected rows by default). daily_mean_aqi does the same for calendar days.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+from AirQuality_Profile import stage
+from AirQuality_Time import ns_per_day, utc_epoch_ns
+
+ns_per_10_minutes = 600 * 10**9
+min_completeness = 0.75  # Share of the expected rows a window needs before its mean is used
+
+### Rolling mean over a time window -------------------------------------------------------------------------------------------------------------------------------
+def rolling_mean(epoch_ns, values, window_ns=ns_per_day, cadence_ns=ns_per_10_minutes, completeness=min_completeness):
+    # Trailing mean over (t - window, t] at every row, the number of valid rows in it, and that number as a share of window / cadence.
+    # Rows must be in time order. Means of windows below the completeness threshold are NaN
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+
+    start = np.searchsorted(epoch_ns, epoch_ns - window_ns, side='right')  # First row inside each window
+    end = np.arange(1, len(values) + 1)
+    samples = counts[end] - counts[start]
+    share = samples / (window_ns / cadence_ns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(share >= completeness, (sums[end] - sums[start]) / samples, np.nan)
+    return mean, samples, share
+
+def rolling_24h(df, column='pm2.5 Avg', cadence_ns=ns_per_10_minutes, completeness=min_completeness):
+    # Trailing 24-hour mean concentration and its AQI for every row of a 10-minute frame (time_stamp plus column), with the same index
+    with stage('rolling 24h', rows=len(df)):
+        epoch_ns = utc_epoch_ns(df['time_stamp'])
+        order = None
+        if np.any(np.diff(epoch_ns) < 0):
+            order = np.argsort(epoch_ns, kind='stable')  # Work in time order, then put the results back in row order
+            epoch_ns = epoch_ns[order]
+        values = df[column].to_numpy(dtype=np.float64)
+        mean, samples, share = rolling_mean(epoch_ns, values if order is None else values[order], ns_per_day, cadence_ns, completeness)
+        if order is not None:
+            unsorted = np.empty_like(order)
+            unsorted[order] = np.arange(len(order))
+            mean, samples, share = mean[unsorted], samples[unsorted], share[unsorted]
+        return pd.DataFrame({
+            '24h mean': mean,
+            '24h samples': samples,
+            '24h completeness': share,
+            '24h AQI': pm25_to_aqi_array(mean),
+        }, index=df.index)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Calendar days -------------------------------------------------------------------------------------------------------------------------------------------------
+def daily_mean_aqi(daily_mean, daily_count, cadence_ns=ns_per_10_minutes, completeness=min_completeness):
+    # AQI of each local day's mean concentration, for days with enough rows. daily_mean and daily_count are indexed by timezone-aware local
+    # midnight (e.g. from the rollups), so 23- and 25-hour days at the clock changes expect fewer or more rows
+    index = pd.DatetimeIndex(daily_mean.index)
+    if index.tz is None:
+        expected = np.full(len(index), ns_per_day / cadence_ns)
+    else:
+        next_midnight = (index.tz_localize(None) + pd.Timedelta(days=1)).tz_localize(index.tz, ambiguous='NaT', nonexistent='shift_forward')
+        expected = (next_midnight - index).total_seconds().to_numpy() * 10**9 / cadence_ns
+    share = np.asarray(daily_count, dtype=np.float64) / expected
+    mean = np.where(share >= completeness, np.asarray(daily_mean, dtype=np.float64), np.nan)
+    return pd.Series(pm25_to_aqi_array(mean), index=daily_mean.index, name='pm2.5 24h AQI')
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
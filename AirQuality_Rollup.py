@@ -0,0 +1,176 @@
+# AirQuality_Rollup.py
+# Description: Persisted rollups of the 10-minute data: count, sum, min and max of pm2.5 Avg and AQI for every local hour, day, month and year. Hours
+# are built from the rows (keyed by their UTC start, so the repeated hour at the end of daylight saving stays two hours), and each coarser level
+# from the one below it. When new rows arrive only the buckets they fall in are updated (count, sum,
+# min and max can be combined without the raw rows), so daily means, yearly summaries and the EPA comparison read the rollups instead of the archive.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Cache import load_table, save_table, source_fingerprint, feather
+from AirQuality_Profile import stage
+from AirQuality_Time import local_epoch_ns, ns_per_day, ns_per_hour, utc_epoch_ns
+
+rollup_levels = ['hour', 'day', 'month', 'year']
+rollup_columns = ['pm2.5 Avg', 'pm2.5 AQI']
+rollup_stats = ['count', 'sum', 'min', 'max']
+hour_keys_format = 'utc'  # Saved in state.json; rollups saved with other hour keys are rebuilt
+
+### Build rollups -------------------------------------------------------------------------------------------------------------------------------------------------
+def combine_buckets(table, keys):
+    # Group rollup rows by keys, combining count and sum by adding and min and max by taking the min and max
+    parts = {}
+    for column in rollup_columns:
+        parts[column] = pd.DataFrame({
+            'count': table[(column, 'count')].groupby(keys).sum(),
+            'sum': table[(column, 'sum')].groupby(keys).sum(),
+            'min': table[(column, 'min')].groupby(keys).min(),
+            'max': table[(column, 'max')].groupby(keys).max(),
+        })
+    return pd.concat(parts, axis=1)
+
+def parent_keys(index, level, timezone):
+    # Local start of the day, month or year each bucket belongs to. Hours are keyed by UTC start, the other levels by local start
+    if level == 'day':
+        local_ns = local_epoch_ns(index.as_unit('ns').asi8, timezone)
+        return pd.DatetimeIndex((local_ns // ns_per_day * ns_per_day).astype('datetime64[ns]'))
+    if level == 'month':
+        return index.to_period('M').to_timestamp()
+    return index.to_period('Y').to_timestamp()
+
+def compute_rollups(df, timezone='US/Central'):
+    # All four levels for the rows of df (needs time_stamp, pm2.5 Avg and pm2.5 AQI). Hours are labelled with the UTC time of their local start
+    # (the UTC hour, in whole-hour zones), days, months and years with their local start time
+    with stage('resampling', rows=len(df)):
+        utc_ns = utc_epoch_ns(df['time_stamp'])
+        local_ns = local_epoch_ns(utc_ns, timezone)
+        hour_keys = pd.DatetimeIndex((utc_ns - local_ns % ns_per_hour).astype('datetime64[ns]'), name='bucket')
+        hour = df[rollup_columns].groupby(hour_keys).agg(rollup_stats)
+        hour.columns = pd.MultiIndex.from_tuples(hour.columns)
+        rollups = {'hour': hour}
+        for child, level in zip(rollup_levels[:-1], rollup_levels[1:]):
+            rollups[level] = combine_buckets(rollups[child], parent_keys(rollups[child].index, level, timezone))
+            rollups[level].index.name = 'bucket'
+    return rollups
+
+def merge_rollups(old, new):
+    # Update old with new, touching only the buckets new has. Buckets only in one of them are copied as they are
+    merged = {}
+    for level in rollup_levels:
+        if old.get(level) is None or len(old[level]) == 0:
+            merged[level] = new[level]
+            continue
+        overlap = old[level].index.intersection(new[level].index)
+        updated = None
+        if len(overlap):
+            both = pd.concat([old[level].loc[overlap], new[level].loc[overlap]])
+            updated = combine_buckets(both, both.index)
+        merged[level] = pd.concat([old[level].drop(overlap), new[level].drop(overlap), updated]).sort_index()
+        merged[level].index.name = 'bucket'
+    return merged
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Persisted rollups ---------------------------------------------------------------------------------------------------------------------------------------------
+def rollup_path(rollup_dir, level):
+    return os.path.join(rollup_dir, level + ('.feather' if feather is not None else '.pkl'))
+
+def read_rollup_state(rollup_dir):
+    try:
+        with open(os.path.join(rollup_dir, 'state.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'last_time_stamp': None, 'timezone': None}
+
+def rows_checksum(df):
+    # Row count and sums of the rolled-up columns, to tell whether rows already counted are still the same
+    return len(df), [float(np.nansum(df[column].to_numpy(dtype=np.float64))) for column in rollup_columns]
+
+def rollups_are_current(state, df, source):
+    # The saved rollups can be extended with df's newer rows only if they were made from the same source and time zone, and the rows of df at or
+    # before the last time stamp are the ones that were counted. A changed source file (grown, backfilled or corrected) is checked row by row
+    if state.get('last_time_stamp') is None or state.get('source') != source or state.get('hour_keys') != hour_keys_format:
+        return False
+    if source is not None and state.get('fingerprint') == source_fingerprint(source):
+        return True  # Same file as last time
+    counted = df[df['time_stamp'] <= pd.Timestamp(state['last_time_stamp'])]
+    if len(counted) == 0:
+        return True  # Only new rows were passed in
+    rows, sums = rows_checksum(counted)
+    return rows == state.get('rows') and np.allclose(sums, state.get('sums', []), rtol=1e-9, atol=1e-6)
+
+def load_rollups(rollup_dir):
+    rollups = {}
+    for level in rollup_levels:
+        path = rollup_path(rollup_dir, level)
+        if not os.path.exists(path):
+            return {}
+        table = load_table(path).set_index('bucket')
+        table.columns = pd.MultiIndex.from_tuples([tuple(c.split('|')) for c in table.columns])  # Flat names on disk
+        rollups[level] = table
+    return rollups
+
+def save_rollups(rollups, rollup_dir, state):
+    os.makedirs(rollup_dir, exist_ok=True)
+    for level in rollup_levels:
+        table = rollups[level].copy()
+        table.columns = ['|'.join(c) for c in table.columns]
+        save_table(table.reset_index(), rollup_path(rollup_dir, level))
+    tmp_path = os.path.join(rollup_dir, 'state.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(rollup_dir, 'state.json'))
+
+def update_rollups(rollup_dir, df, timezone='US/Central', rebuild=False, source=None):
+    # Fold the rows of df newer than the last update into the saved rollups and return them. df can be the whole archive or only the new
+    # rows; rows at or before the last time stamp already counted are skipped. source is the file df was read from (csv or SD card folder):
+    # the rollups start over from df when it is a different file, when the file changed and its older rows differ from the ones counted,
+    # when the time zone changed, or with rebuild=True
+    source = None if source is None else os.path.abspath(source)
+    state = read_rollup_state(rollup_dir)
+    rollups = {}
+    if not rebuild and state['timezone'] == timezone and rollups_are_current(state, df, source):
+        rollups = load_rollups(rollup_dir)
+    if rollups:
+        df = df[df['time_stamp'] > pd.Timestamp(state['last_time_stamp'])]
+        rows, sums = state['rows'], state['sums']
+    else:
+        rows, sums = 0, [0.0] * len(rollup_columns)
+    if len(df) == 0 and rollups:
+        return rollups
+
+    rollups = merge_rollups(rollups, compute_rollups(df, timezone))
+    new_rows, new_sums = rows_checksum(df)
+    state = {'last_time_stamp': df['time_stamp'].max().isoformat(), 'timezone': timezone, 'hour_keys': hour_keys_format, 'source': source,
+             'fingerprint': None if source is None else source_fingerprint(source), 'rows': rows + new_rows,
+             'sums': [old + new for old, new in zip(sums, new_sums)]}
+    save_rollups(rollups, rollup_dir, state)
+    return rollups
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Views read from the rollups -----------------------------------------------------------------------------------------------------------------------------------
+def rollup_means(rollups, level='day', timezone=None):
+    # Mean pm2.5 Avg and AQI per bucket, the same as resample('D').mean() etc. on the raw rows (buckets without data are NaN).
+    # With timezone the index is made timezone-aware, like the Central_time_stamp index the scripts resample: hours are converted from UTC
+    # (without it they stay in UTC), and a local start that falls in a daylight saving change is taken the same way as time_to_epoch_ns does
+    table = rollups[level]
+    means = pd.DataFrame({column: table[(column, 'sum')] / table[(column, 'count')].replace(0, np.nan) for column in rollup_columns})
+    freq = {'hour': 'h', 'day': 'D', 'month': 'MS', 'year': 'YS'}[level]
+    means = means.asfreq(freq)
+    if timezone is not None and level == 'hour':
+        means.index = means.index.tz_localize('UTC').tz_convert(timezone)
+    elif timezone is not None:
+        means.index = means.index.tz_localize(timezone, ambiguous=np.ones(len(means), dtype=bool), nonexistent='shift_forward')
+    return means
+
+def rollup_summary(rollups, level='year'):
+    # Count, mean, min and max of pm2.5 Avg and AQI per bucket
+    table = rollups[level].copy()
+    for column in rollup_columns:
+        table[(column, 'mean')] = table[(column, 'sum')] / table[(column, 'count')].replace(0, np.nan)
+    return table.sort_index(axis=1)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,94 @@
+# AirQuality_SD_ingest.py
+# Description: Load every Purple Air SD card csv in a folder (e.g. 20250610.csv, 20250611.csv, 20250611p2.csv) as one table. Files are read in parallel
+# with a process pool, each file is put in time order on its own, and the sorted files are merged pairwise (a k-way merge) instead of re-sorting the
+# whole table. Rows with a UTCDateTime already seen in an earlier file are dropped, so overlapping files don't produce duplicates.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Profile import instrumented
+from AirQuality_Time import parse_utc, time_formats
+
+sd_file_pattern = re.compile(r'^\d{8}(p\d+)?\.csv$', re.IGNORECASE)  # yyyymmdd.csv, or yyyymmddp2.csv for a second file on the same day
+
+### Find and read the SD card files -------------------------------------------------------------------------------------------------------------------------------
+def sd_file_order(name):
+    # 20250611.csv comes before 20250611p1.csv, which comes before 20250611p2.csv
+    match = re.match(r'^(\d{8})(?:p(\d+))?', name, re.IGNORECASE)
+    return match.group(1), int(match.group(2) or 0)
+
+def find_sd_files(folder):
+    names = [name for name in os.listdir(folder) if sd_file_pattern.match(name)]
+    return [os.path.join(folder, name) for name in sorted(names, key=sd_file_order)]
+
+def read_sd_file(path, time_column='UTCDateTime'):
+    df = pd.read_csv(path)
+    df[time_column] = parse_utc(df[time_column], time_formats.get(time_column))
+    df = df.dropna(subset=[time_column])
+    if not df[time_column].is_monotonic_increasing:
+        df = df.sort_values(time_column, kind='stable')  # Only this file is sorted, never the combined table
+    return df.reset_index(drop=True)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Merge files that are each already in time order ---------------------------------------------------------------------------------------------------------------
+def time_values(df, time_column):
+    # UTC time stamps as int64 nanoseconds
+    return df[time_column].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def merge_two(left, right, time_column):
+    # Where each row of right lands among the rows of left. Ties go after the left rows, so the earlier file comes first
+    t_left = time_values(left, time_column)
+    t_right = time_values(right, time_column)
+    if len(t_left) == 0 or len(t_right) == 0 or t_left[-1] <= t_right[0]:
+        return pd.concat([left, right], ignore_index=True)  # No overlap, nothing to interleave
+    right_positions = np.searchsorted(t_left, t_right, side='right') + np.arange(len(t_right))
+    order = np.empty(len(t_left) + len(t_right), dtype=np.int64)
+    is_right = np.zeros(len(order), dtype=bool)
+    is_right[right_positions] = True
+    order[~is_right] = np.arange(len(t_left))
+    order[is_right] = np.arange(len(t_right)) + len(t_left)
+    return pd.concat([left, right], ignore_index=True).take(order).reset_index(drop=True)
+
+def merge_sorted_frames(frames, time_column='UTCDateTime'):
+    # Merge neighbours pairwise until one table is left: log2(k) rounds of linear merges for k files
+    frames = [frame for frame in frames if len(frame) > 0]
+    if not frames:
+        return pd.DataFrame()
+    while len(frames) > 1:
+        merged = [merge_two(frames[i], frames[i + 1], time_column) for i in range(0, len(frames) - 1, 2)]
+        if len(frames) % 2 == 1:
+            merged.append(frames[-1])
+        frames = merged
+    merged = frames[0]
+
+    # Equal time stamps sit next to each other now, with the row from the earliest file first
+    times = time_values(merged, time_column)
+    keep = np.ones(len(times), dtype=bool)
+    keep[1:] = times[1:] != times[:-1]
+    return merged[keep].reset_index(drop=True)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Load a whole folder -------------------------------------------------------------------------------------------------------------------------------------------
+@instrumented('load')
+def load_sd_folder(folder='.', files=None, workers=None, time_column='UTCDateTime'):
+    # Scripts that call this must keep their code under "if __name__ == '__main__':", since the worker processes import the calling script
+    if files is None:
+        files = find_sd_files(folder)
+    else:
+        files = [os.path.join(folder, name) for name in files]
+    if not files:
+        raise FileNotFoundError(f"No SD card csv files found in {os.path.abspath(folder)}")
+
+    if workers == 1 or len(files) == 1:
+        frames = [read_sd_file(path, time_column) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(read_sd_file, files, [time_column] * len(files)))
+    return merge_sorted_frames(frames, time_column)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,137 @@
+# AirQuality_Stream.py
+# Description: Constant-memory processing of a Purple Air 10-minute archive. The csv is read in fixed-size chunks, and each chunk is cleaned, A/B averaged
+# and converted to AQI, then folded into running totals (daily means, per-hour AQI and concentration distributions, yearly summaries) and thrown away.
+# Memory depends on the chunk size and the number of days, not on the number of rows, so multi-year, multi-sensor archives fit in bounded RAM.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_Incremental import add_derived_columns
+from AirQuality_Time import parse_time_columns
+
+stream_columns = ['time_stamp', 'pm2.5_atm_a', 'pm2.5_atm_b']  # Only the columns the pipeline needs are parsed
+
+### Quantiles from a histogram ------------------------------------------------------------------------------------------------------------------------------------
+def histogram_quantile(counts, values, q):
+    # Same answer as np.percentile(data, 100 * q) (linear interpolation) when data is described by counts of each value in values
+    n = counts.sum()
+    if n == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    v_lower = values[np.searchsorted(cumulative, lower, side='right')]
+    v_upper = values[np.searchsorted(cumulative, upper, side='right')]
+    return v_lower + (v_upper - v_lower) * (position - lower)
+
+def histogram_summary(counts, values):
+    # Min, quartiles, median, mean and max of data described by counts of each value
+    n = counts.sum()
+    nonzero = np.flatnonzero(counts)
+    if n == 0:
+        return {'count': 0, 'min': np.nan, 'q1': np.nan, 'median': np.nan, 'q3': np.nan, 'max': np.nan, 'mean': np.nan}
+    return {
+        'count': int(n),
+        'min': values[nonzero[0]],
+        'q1': histogram_quantile(counts, values, 0.25),
+        'median': histogram_quantile(counts, values, 0.5),
+        'q3': histogram_quantile(counts, values, 0.75),
+        'max': values[nonzero[-1]],
+        'mean': (counts * values).sum() / n,
+    }
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Running aggregates --------------------------------------------------------------------------------------------------------------------------------------------
+class StreamAggregates:
+    # AQI is a whole number from 0 to 500, and concentrations are compared to the breakpoints after EPA rounding to 0.1 µg/m³,
+    # so both per-hour distributions are kept as exact counts at those resolutions (24 x 501 and 24 x 5006 bins)
+    aqi_values = np.arange(501, dtype=np.float64)
+    pm25_values = np.arange(5006, dtype=np.float64) / 10  # 0.0 to 500.5 µg/m³
+
+    def __init__(self):
+        self.rows = 0
+        self.daily = None  # sum and count of pm2.5 Avg and AQI for each local day
+        self.yearly = None  # count, sum, min, max of pm2.5 Avg and AQI for each local year
+        self.hourly_aqi_counts = np.zeros((24, len(self.aqi_values)), dtype=np.int64)
+        self.hourly_pm25_counts = np.zeros((24, len(self.pm25_values)), dtype=np.int64)
+
+    def update(self, chunk, local_column='Central_time_stamp'):
+        self.rows += len(chunk)
+        local = chunk[local_column]
+        day = local.dt.tz_localize(None).dt.normalize()
+
+        # Daily sums and counts (days split across two chunks are added together)
+        daily = chunk.groupby(day)[['pm2.5 Avg', 'pm2.5 AQI']].agg(['sum', 'count'])
+        self.daily = daily if self.daily is None else self.daily.add(daily, fill_value=0)
+
+        # Yearly count, sum, min and max
+        yearly = chunk.groupby(local.dt.year)[['pm2.5 Avg', 'pm2.5 AQI']].agg(['count', 'sum', 'min', 'max'])
+        if self.yearly is None:
+            self.yearly = yearly
+        else:
+            combined = pd.concat([self.yearly, yearly])
+            by_year = combined.groupby(level=0)
+            self.yearly = pd.concat([by_year[[c for c in combined.columns if c[1] in ('count', 'sum')]].sum(),
+                                     by_year[[c for c in combined.columns if c[1] == 'min']].min(),
+                                     by_year[[c for c in combined.columns if c[1] == 'max']].max()], axis=1)[combined.columns]
+
+        # Per-hour distributions as counts, filled in with one bincount over (hour, value) pairs
+        hour = local.dt.hour.to_numpy()
+        aqi = chunk['pm2.5 AQI'].to_numpy()
+        valid = ~np.isnan(aqi)
+        self.hourly_aqi_counts += np.bincount(hour[valid] * len(self.aqi_values) + aqi[valid].astype(np.int64),
+                                              minlength=self.hourly_aqi_counts.size).reshape(self.hourly_aqi_counts.shape)
+        pm25 = np.round(chunk['pm2.5 Avg'].to_numpy() * 10)
+        valid = ~np.isnan(pm25) & (pm25 >= 0)
+        bins = np.minimum(pm25[valid].astype(np.int64), len(self.pm25_values) - 1)
+        self.hourly_pm25_counts += np.bincount(hour[valid] * len(self.pm25_values) + bins,
+                                               minlength=self.hourly_pm25_counts.size).reshape(self.hourly_pm25_counts.shape)
+
+    def daily_means(self):
+        # Daily average pm2.5 and AQI, the same as resample('D').mean() on the full frame (days with no data are NaN)
+        means = pd.DataFrame({
+            'pm2.5 Avg': self.daily[('pm2.5 Avg', 'sum')] / self.daily[('pm2.5 Avg', 'count')],
+            'pm2.5 AQI': self.daily[('pm2.5 AQI', 'sum')] / self.daily[('pm2.5 AQI', 'count')],
+        })
+        return means.sort_index().asfreq('D')
+
+    def yearly_summary(self):
+        summary = self.yearly.sort_index().copy()
+        for column in ['pm2.5 Avg', 'pm2.5 AQI']:
+            summary[(column, 'mean')] = summary[(column, 'sum')] / summary[(column, 'count')]
+        return summary.sort_index(axis=1)
+
+    def hourly_summary(self, column='pm2.5 AQI'):
+        # Min, quartiles, median, mean and max for each hour of the day. Concentrations are at 0.1 µg/m³ resolution
+        if column == 'pm2.5 AQI':
+            counts, values = self.hourly_aqi_counts, self.aqi_values
+        else:
+            counts, values = self.hourly_pm25_counts, self.pm25_values
+        return pd.DataFrame([histogram_summary(counts[h], values) for h in range(24)], index=pd.RangeIndex(24, name='hour'))
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Stream a csv through the pipeline -----------------------------------------------------------------------------------------------------------------------------
+def stream_archive(csv_paths, chunksize=100_000, timezone='US/Central', aggregates=None):
+    # csv_paths can be one file or a list (e.g. several sensors or exports). Only one chunk is in memory at a time
+    if isinstance(csv_paths, str):
+        csv_paths = [csv_paths]
+    if aggregates is None:
+        aggregates = StreamAggregates()
+    for csv_path in csv_paths:
+        for chunk in pd.read_csv(csv_path, usecols=stream_columns, chunksize=chunksize):
+            parse_time_columns(chunk, ['time_stamp'])
+            aggregates.update(add_derived_columns(chunk, timezone))
+    return aggregates
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    # Usage: python AirQuality_Stream.py <10-minute export csv> [more csv files ...]
+    totals = stream_archive(sys.argv[1:])
+    print(f"{totals.rows} rows streamed")
+    print(totals.yearly_summary())
+    print(totals.hourly_summary())
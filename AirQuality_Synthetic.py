@@ -0,0 +1,157 @@
+# AirQuality_Synthetic.py
+# Description: Realistic stand-in Purple Air data for benchmarks, since the real exports aren't in the repo. Writes 10-minute exports (time_stamp,
+# sensor_index, humidity_a, pm2.5_atm_a, pm2.5_atm_b), SD card folders (yyyymmdd.csv files with UTCDateTime, mac_address, pm2.5_aqi_atm,
+# pm2.5_aqi_atm_b) and a matching EPA daily file, from one month up to 20 years. Concentrations follow a seasonal and daily cycle with
+# correlated noise, smoke events, small A/B disagreement, occasional faulty readings above 500 and gaps in the record.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from AirQuality_AQI import pm25_to_aqi_array
+
+size_months = {'1m': 1, '6m': 6, '1y': 12, '5y': 60, '10y': 120, '20y': 240}  # Named archive sizes used by the benchmarks
+
+### Concentration model -------------------------------------------------------------------------------------------------------------------------------------------
+def synthetic_pm25(times, rng):
+    # Ground-truth PM2.5 (µg/m³) at each time: lognormal around a seasonal and daily cycle, AR(1) noise, plus a few multi-day smoke events
+    n = len(times)
+    day_of_year = times.dayofyear.to_numpy()
+    hour = times.hour.to_numpy() + times.minute.to_numpy() / 60
+    seasonal = 0.25 * np.cos(2 * np.pi * (day_of_year - 200) / 365.25)  # Higher in summer
+    diurnal = 0.2 * np.cos(2 * np.pi * (hour - 13) / 24)  # Peak in the early afternoon (UTC)
+
+    # AR(1) noise done as a filter over the whole array at once
+    phi = 0.97
+    shocks = rng.normal(0, 0.12, n)
+    noise = np.empty(n)
+    block = 4096  # Closed form inside each block: noise[i] = phi**i * noise[0] + sum phi**(i-k) * shocks[k]
+    powers = phi ** np.arange(block)
+    previous = 0.0
+    for start in range(0, n, block):
+        s = shocks[start:start + block]
+        m = len(s)
+        scaled = np.cumsum(s / powers[:m]) * powers[:m]
+        noise[start:start + m] = scaled + previous * powers[:m] * phi
+        previous = noise[start + m - 1]
+    pm25 = np.exp(np.log(8.0) + seasonal + diurnal + noise)
+
+    # Smoke events: a few per year, rising fast and decaying over days
+    years = max(n / 52_560, 1 / 12)
+    span = (times[-1] - times[0]).total_seconds() if n > 1 else 1.0
+    elapsed = (times - times[0]).total_seconds().to_numpy()
+    for _ in range(rng.poisson(3 * years)):
+        onset = rng.uniform(0, span)
+        peak = rng.lognormal(np.log(80), 0.6)
+        after = elapsed - onset
+        in_event = (after >= 0) & (after < 10 * 86_400)
+        pm25[in_event] += peak * np.exp(-after[in_event] / rng.uniform(0.5, 3) / 86_400)
+    return pm25
+
+def channel_pair(pm25, rng, fault_rate=0.0005):
+    # A and B channel readings: each off by a few percent, rounded to 3 decimals, with rare faulty readings far above the 500.4 cap
+    a = pm25 * rng.normal(1.0, 0.05, len(pm25))
+    b = pm25 * rng.normal(1.0, 0.05, len(pm25))
+    for channel in (a, b):
+        faulty = rng.random(len(pm25)) < fault_rate
+        channel[faulty] = rng.uniform(600, 2000, faulty.sum())
+    return np.round(np.maximum(a, 0), 3), np.round(np.maximum(b, 0), 3)
+
+def drop_gaps(n, rng, gaps_per_year=6, interval_minutes=10):
+    # Keep mask with a few outages (hours to days) removed, like sensors losing power or Wi-Fi
+    keep = np.ones(n, dtype=bool)
+    rows_per_year = 365.25 * 24 * 60 / interval_minutes
+    for _ in range(rng.poisson(gaps_per_year * n / rows_per_year)):
+        start = rng.integers(0, n)
+        keep[start:start + int(rng.lognormal(np.log(12 * 60 / interval_minutes), 1.0))] = False
+    return keep
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### 10-minute export ----------------------------------------------------------------------------------------------------------------------------------------------
+def synthetic_10minute(start='2019-12-01', months=12, seed=0, sensor_index=123):
+    # One 10-minute export as a DataFrame with the same columns and text formats as the Purple Air download
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(start, pd.Timestamp(start) + pd.DateOffset(months=months), freq='10min', inclusive='left', tz='UTC')
+    keep = drop_gaps(len(times), rng)
+    pm25 = synthetic_pm25(times, rng)
+    a, b = channel_pair(pm25, rng)
+    humidity = np.clip(60 + 20 * np.cos(2 * np.pi * (times.hour.to_numpy() - 10) / 24) + rng.normal(0, 8, len(times)), 5, 100)
+    stamps = np.char.add(np.datetime_as_string(times.tz_localize(None).to_numpy(), unit='s'), 'Z')
+    return pd.DataFrame({
+        'time_stamp': stamps[keep],
+        'sensor_index': sensor_index,
+        'humidity_a': np.round(humidity[keep], 1),
+        'pm2.5_atm_a': a[keep],
+        'pm2.5_atm_b': b[keep],
+    })
+
+def write_10minute_csv(path, start='2019-12-01', months=12, seed=0):
+    df = synthetic_10minute(start, months, seed)
+    df.to_csv(path, index=False)
+    return df
+
+def write_epa_daily_csv(path, df_10minute, seed=0):
+    # EPA daily file (Date, Daily Mean PM2.5 Concentration, Daily AQI Value) for the same days: the true daily mean with monitor noise
+    rng = np.random.default_rng(seed + 1)
+    times = pd.to_datetime(df_10minute['time_stamp'], format='%Y-%m-%dT%H:%M:%SZ', utc=True).dt.tz_convert('US/Central')
+    avg = df_10minute[['pm2.5_atm_a', 'pm2.5_atm_b']].where(df_10minute[['pm2.5_atm_a', 'pm2.5_atm_b']] <= 500.4).mean(axis=1)
+    daily = avg.groupby(times.dt.date).mean().dropna()
+    epa = np.maximum(daily.to_numpy() * rng.normal(0.8, 0.08, len(daily)), 0)  # PurpleAir reads high against the reference monitors
+    pd.DataFrame({
+        'Date': pd.to_datetime(daily.index).strftime('%m/%d/%Y'),
+        'Daily Mean PM2.5 Concentration': epa,
+        'Daily AQI Value': pm25_to_aqi_array(epa).astype(np.int64),
+    }).to_csv(path, index=False)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### SD card folder ------------------------------------------------------------------------------------------------------------------------------------------------
+def write_sd_folder(folder, start='2025-06-10', days=7, seed=0, interval_seconds=120, split_rate=0.15):
+    # One file per UTC day (yyyymmdd.csv). Some days are split in two after a restart (yyyymmdd.csv + yyyymmddp2.csv), and the second file
+    # repeats a few rows from the first, like the real cards do. Returns the file paths
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    times = pd.date_range(start, periods=days * 86_400 // interval_seconds, freq=f'{interval_seconds}s', tz='UTC')
+    a, b = channel_pair(synthetic_pm25(times, rng), rng)
+    aqi_a = np.nan_to_num(pm25_to_aqi_array(np.where(a <= 500.4, a, 500.4)), nan=0).astype(np.int64)
+    aqi_b = np.nan_to_num(pm25_to_aqi_array(np.where(b <= 500.4, b, 500.4)), nan=0).astype(np.int64)
+    stamps = np.char.add(np.char.replace(np.datetime_as_string(times.tz_localize(None).to_numpy(), unit='s'), '-', '/'), 'z')
+    df = pd.DataFrame({'UTCDateTime': stamps, 'mac_address': 'aa', 'pm2.5_aqi_atm': aqi_a, 'pm2.5_aqi_atm_b': aqi_b})
+
+    paths = []
+    day_codes = times.strftime('%Y%m%d')
+    for day in pd.unique(day_codes):
+        rows = df[day_codes == day]
+        if rng.random() < split_rate and len(rows) > 10:
+            cut = int(rng.integers(5, len(rows) - 5))
+            parts = [(f'{day}.csv', rows.iloc[:cut]), (f'{day}p2.csv', rows.iloc[max(cut - 3, 0):])]
+        else:
+            parts = [(f'{day}.csv', rows)]
+        for name, part in parts:
+            path = os.path.join(folder, name)
+            part.to_csv(path, index=False)
+            paths.append(path)
+    return paths
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Command line --------------------------------------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Example: python AirQuality_Synthetic.py --size 5y --out synthetic
+    parser = argparse.ArgumentParser(description='Write synthetic Purple Air exports for testing and benchmarks.')
+    parser.add_argument('--size', default='1y', choices=list(size_months), help='Length of the 10-minute archive')
+    parser.add_argument('--start', default='2019-12-01')
+    parser.add_argument('--sd-days', type=int, default=7, help='Days of SD card files')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic', help='Output folder')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    csv_path = os.path.join(args.out, f'synthetic_{args.size}_10-Minute_Average.csv')
+    df = write_10minute_csv(csv_path, args.start, size_months[args.size], args.seed)
+    write_epa_daily_csv(os.path.join(args.out, f'daily_avg_EPA_pm25_synthetic_{args.size}.csv'), df, args.seed)
+    sd_paths = write_sd_folder(os.path.join(args.out, 'SD'), days=args.sd_days, seed=args.seed)
+    print(f"Wrote {len(df)} rows to {csv_path}, an EPA daily file and {len(sd_paths)} SD card files")
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
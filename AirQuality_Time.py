@@ -0,0 +1,100 @@
+# AirQuality_Time.py
+# Description: One time stamp pipeline for the Purple Air files. Time columns are parsed once with an explicit format string (10-minute export, SD card,
+# older exports), kept as int64 UTC epochs (nanoseconds), and turned into local time by adding the site's UTC offset. The offsets come from a small table
+# of daylight saving transitions built once per time zone and date range, so local time, hour, date and year each cost one array operation.
+# Author: Logan Semones
+# First Created: 10/17/2026
+
+import numpy as np
+import pandas as pd
+
+# Known time stamp formats, tried in order
+time_formats = {
+    'time_stamp': '%Y-%m-%dT%H:%M:%SZ',  # 10-minute export, e.g. 2024-06-01T14:20:00Z
+    'UTCDateTime': '%Y/%m/%dT%H:%M:%Sz',  # SD card, e.g. 2025/06/10T14:22:05z
+    'DateTime': '%Y-%m-%d %H:%M:%S',  # Older exports, e.g. 2025-06-01 14:20:00
+}
+
+ns_per_hour = 3_600_000_000_000
+ns_per_day = 24 * ns_per_hour
+
+### Parse time stamps once ----------------------------------------------------------------------------------------------------------------------------------------
+def parse_utc(values, fmt=None, utc=True):
+    # Parse a column of time stamp strings as timezone-aware UTC. The column's usual format is tried first, then the other known formats,
+    # and only if none of them fit does pandas guess the format (slow). utc=False keeps the wall-clock times naive, for local-time exports
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values, utc=utc)  # Already parsed
+    formats = [fmt] if fmt is not None else []
+    formats += [f for f in time_formats.values() if f not in formats]
+    for f in formats:
+        try:
+            return pd.to_datetime(values, format=f, utc=utc)
+        except (ValueError, TypeError):
+            continue
+    return pd.to_datetime(values, utc=utc)
+
+def parse_time_columns(df, columns):
+    # Parse the named time columns of df in place, using the known format for each column name
+    for column in columns or []:
+        if column in df.columns:
+            df[column] = parse_utc(df[column], time_formats.get(column))
+    return df
+
+def utc_epoch_ns(times):
+    # int64 nanoseconds since 1970-01-01 UTC from a parsed (timezone-aware) column or index. Naive time stamps are taken as UTC
+    return np.asarray(times.to_numpy(dtype='datetime64[ns]')).view(np.int64)
+
+def time_to_epoch_ns(value, timezone='US/Central'):
+    # One time (e.g. '2024-01-01', '2024-06-01T14:20:00Z', a Timestamp or datetime) as int64 UTC nanoseconds. Times without a zone are local
+    # time in timezone (an ambiguous hour at the end of daylight saving is taken as the first one); integers are already epoch nanoseconds
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize(timezone, ambiguous=True, nonexistent='shift_forward')
+    return stamp.as_unit('ns').value
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### UTC offsets from daylight saving transitions ------------------------------------------------------------------------------------------------------------------
+def utc_offset_table(timezone, start_ns, end_ns):
+    # Times at which the UTC offset of timezone changes between start and end, and the offset from each of them on.
+    # Transitions happen on the hour in the zones we use, so the zone is checked once per hour and only the changes are kept
+    first_hour = (start_ns // ns_per_hour - 24) * ns_per_hour
+    last_hour = (end_ns // ns_per_hour + 25) * ns_per_hour
+    hours = pd.to_datetime(np.arange(first_hour, last_hour, ns_per_hour), unit='ns', utc=True)
+    offsets = (hours.tz_convert(timezone).tz_localize(None) - hours.tz_localize(None)).asi8
+    changes = np.flatnonzero(np.diff(offsets)) + 1
+    starts = np.concatenate([[np.iinfo(np.int64).min], hours.asi8[changes]])
+    return starts, np.concatenate([[offsets[0]], offsets[changes]])
+
+def local_epoch_ns(epoch_ns, timezone, table=None):
+    # Local wall-clock time as int64 nanoseconds: UTC plus the offset in force at each time stamp
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    if len(epoch_ns) == 0:
+        return epoch_ns.copy()
+    if table is None:
+        table = utc_offset_table(timezone, epoch_ns.min(), epoch_ns.max())
+    starts, offsets = table
+    return epoch_ns + offsets[np.searchsorted(starts, epoch_ns, side='right') - 1]
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+### Local time fields ---------------------------------------------------------------------------------------------------------------------------------------------
+def local_hour(local_ns):
+    return (local_ns // ns_per_hour % 24).astype(np.int8)
+
+def local_date(local_ns):
+    return (local_ns // ns_per_day).astype('datetime64[D]')
+
+def local_year(local_ns):
+    return local_date(local_ns).astype('datetime64[Y]').astype(np.int64) + 1970
+
+def local_time_fields(times, timezone):
+    # Local hour, date and year for a column of time stamps, with one offset lookup shared by all three
+    local_ns = local_epoch_ns(utc_epoch_ns(times), timezone)
+    index = times.index if isinstance(times, pd.Series) else None
+    return pd.DataFrame({'hour': local_hour(local_ns), 'date': local_date(local_ns), 'year': local_year(local_ns)}, index=index)
+
+def to_local_timestamps(epoch_ns, timezone):
+    # Timezone-aware local time stamps (for plotting) from UTC epochs
+    return pd.to_datetime(np.asarray(epoch_ns, dtype=np.int64), unit='ns', utc=True).tz_convert(timezone)
+### ---------------------------------------------------------------------------------------------------------------------------------------------------------------